@@ -1,54 +1,129 @@
-from flask import Flask, url_for as flask_url_for
+from flask import Flask, request, url_for as flask_url_for
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from config import Config
+import hashlib
 import os
 
 db = SQLAlchemy()
+cache = Cache()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **app.config['SQLALCHEMY_ENGINE_OPTIONS'],
+            **app.config.get('SERVER_POOL_OPTIONS', {}),
+        }
+    
     db.init_app(app)
+    cache.init_app(app)
+    
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            journal_mode = app.config.get('SQLITE_JOURNAL_MODE', 'DELETE')
+            
+            @event.listens_for(db.engine, 'connect')
+            def set_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+                cursor.execute('PRAGMA synchronous=NORMAL')
+                cursor.execute('PRAGMA temp_store=MEMORY')
+                cursor.execute('PRAGMA mmap_size=268435456')
+                cursor.close()
     
     # Add cache busting for static files
     @app.context_processor
     def override_url_for():
         return dict(url_for=dated_url_for)
     
+    def hash_static_file(file_path):
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    
+    # Fingerprint every static asset once at startup so building a URL is a
+    # dict lookup; the hash only changes when the file contents change
+    asset_hashes = {}
+    for root, _, files in os.walk(app.static_folder):
+        for name in files:
+            file_path = os.path.join(root, name)
+            rel_path = os.path.relpath(file_path, app.static_folder).replace(os.sep, '/')
+            asset_hashes[rel_path] = hash_static_file(file_path)
+    app.extensions['asset_hashes'] = asset_hashes
+    
     def dated_url_for(endpoint, **values):
         if endpoint == 'static':
             filename = values.get('filename', None)
             if filename:
-                file_path = os.path.join(app.root_path, 'static', filename)
-                if os.path.isfile(file_path):
-                    values['v'] = int(os.stat(file_path).st_mtime)
+                if app.debug:
+                    # Re-hash on every call in debug mode so local edits show up
+                    file_path = os.path.join(app.static_folder, filename)
+                    version = hash_static_file(file_path) if os.path.isfile(file_path) else None
+                else:
+                    version = asset_hashes.get(filename)
+                if version:
+                    values['v'] = version
         return flask_url_for(endpoint, **values)
     
+    @app.after_request
+    def cache_versioned_static(response):
+        # Fingerprinted URLs never change content, so let browsers keep them
+        if request.endpoint == 'static' and 'v' in request.args and response.status_code == 200:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        return response
+    
     from app import routes, models
     app.register_blueprint(routes.bp)
     
-    with app.app_context():
+    if app.config.get('INIT_SCHEMA'):
+        with app.app_context():
+            db.create_all()
+    
+    @app.cli.command('init-db')
+    def init_db():
+        """Create any missing database tables and UserStats rows."""
+        from app.models import User, UserStats
+        from app.utils import refresh_user_stats
+        
         db.create_all()
+        print("Database tables created.")
+        
+        # Users from before UserStats existed have no row until their next write
+        missing = db.session.query(User.id).outerjoin(
+            UserStats, UserStats.user_id == User.id
+        ).filter(UserStats.user_id.is_(None)).all()
+        for (user_id,) in missing:
+            refresh_user_stats(user_id)
+        db.session.commit()
+        print(f"Created stats rows for {len(missing)} users.")
+    
+    @app.cli.command('migrate-achievements')
+    def migrate_achievements():
+        """Retroactively unlock achievements for existing users (run once per deploy)."""
+        from app.models import AppMeta, User
+        from app.utils import run_retroactive_achievements
+        
+        # Flag row lives in the database so every worker/host sees the same state
+        if db.session.get(AppMeta, 'achievements_migrated'):
+            print("Achievement migration already completed.")
+            return
+        
+        # Plain (id, username) rows, so printing after the commit doesn't reload each User
+        users = User.query.with_entities(User.id, User.username).all()
+        print(f"Running retroactive achievements for {len(users)} users")
+        results = run_retroactive_achievements([user_id for user_id, _ in users])
+        for user_id, username in users:
+            print(f"  {username}: unlocked {len(results[user_id])} achievements")
         
-        # Run retroactive achievement migration
-        migration_flag = os.path.join(os.path.dirname(__file__), '..', '.achievements_migrated')
-        if not os.path.exists(migration_flag):
-            try:
-                from app.models import User
-                from app.utils import run_retroactive_achievements
-                
-                users = User.query.all()
-                for user in users:
-                    print(f"Running retroactive achievements for user: {user.username}")
-                    newly_unlocked = run_retroactive_achievements(user.id)
-                    print(f"  Unlocked {len(newly_unlocked)} achievements")
-                
-                # Create flag file to prevent re-running
-                with open(migration_flag, 'w') as f:
-                    f.write('Migration completed')
-                print("Achievement migration completed successfully!")
-            except Exception as e:
-                print(f"Achievement migration error (safe to ignore on fresh install): {e}")
+        db.session.add(AppMeta(key='achievements_migrated', value='1'))
+        db.session.commit()
+        print("Achievement migration completed successfully!")
     
     return app
@@ -7,6 +7,10 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     habits = db.relationship('Habit', backref='user', lazy=True, cascade='all, delete-orphan')
     achievements = db.relationship('Achievement', backref='user', lazy=True, cascade='all, delete-orphan')
+    stats = db.relationship('UserStats', backref='user', lazy=True, uselist=False, cascade='all, delete-orphan')
+    
+    # Usernames are looked up case-insensitively at login
+    __table_args__ = (db.Index('ix_user_username_lower', db.func.lower(username)),)
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -17,7 +21,8 @@ class Habit(db.Model):
     name = db.Column(db.String(100), nullable=False)
     order = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    entries = db.relationship('HabitEntry', backref='habit', lazy=True, cascade='all, delete-orphan')
+    entries = db.relationship('HabitEntry', backref='habit', lazy=True, cascade='all, delete-orphan',
+                              order_by='HabitEntry.date')
     
     def __repr__(self):
         return f'<Habit {self.name} (User {self.user_id})>'
@@ -28,7 +33,12 @@ class HabitEntry(db.Model):
     date = db.Column(db.Date, nullable=False)
     completed = db.Column(db.Boolean, default=False)
     
-    __table_args__ = (db.UniqueConstraint('habit_id', 'date', name='_habit_date_uc'),)
+    # The unique constraint doubles as the (habit_id, date) lookup index; the
+    # covering index lets per-day/per-habit completion counts skip the table
+    __table_args__ = (
+        db.UniqueConstraint('habit_id', 'date', name='_habit_date_uc'),
+        db.Index('ix_habit_entry_habit_date_completed', 'habit_id', 'date', 'completed'),
+    )
     
     def __repr__(self):
         return f'<HabitEntry habit_id={self.habit_id} date={self.date} completed={self.completed}>'
@@ -45,3 +55,23 @@ class Achievement(db.Model):
     
     def __repr__(self):
         return f'<Achievement {self.achievement_key} (User {self.user_id})>'
+
+class AppMeta(db.Model):
+    """Key/value flags for one-off maintenance tasks (e.g. data migrations)."""
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.String(200))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AppMeta {self.key}={self.value}>'
+
+class UserStats(db.Model):
+    """Entry-derived day counters per user, refreshed whenever entries or habits change."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    perfect_days = db.Column(db.Integer, nullable=False, default=0)
+    almost_perfect_days = db.Column(db.Integer, nullable=False, default=0)
+    days_active = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserStats user_id={self.user_id} days_active={self.days_active}>'
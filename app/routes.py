@@ -1,23 +1,55 @@
-from flask import Blueprint, render_template, request, jsonify, send_file, redirect, url_for, session
-from datetime import datetime, timedelta
+from flask import Blueprint, Response, render_template, request, jsonify, send_file, redirect, url_for, session, stream_with_context, g
+from datetime import date, datetime, timedelta
 from functools import wraps
-from app import db
+from itertools import groupby
+from operator import attrgetter
+from sqlalchemy import and_, func, not_
+from app import cache, db
 from app.models import Habit, HabitEntry, User, Achievement
-from app.utils import get_habit_stats, get_overall_stats, get_date_range_for_challenge, get_week_day_stats, check_achievements
+from app.utils import (
+    ACHIEVEMENT_DEFINITIONS, UPSERT_INSERTS, check_achievements, get_achievement_tooltip,
+    get_achievement_unlock_dates, get_date_range_for_challenge, get_habit_stats, get_locked_with_progress,
+    get_unlocked_achievements, get_user_habits, get_user_overall_stats, get_week_day_stats,
+    invalidate_user_habits, refresh_user_stats
+)
 import json
-import io
 import re
+import zlib
+import orjson
 
 bp = Blueprint('main', __name__)
 
+# YYYY-MM-DD, checked before parsing so malformed input skips the exception path
+DATE_RE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}\Z')
+
+def parse_date(date_str):
+    """Parse a YYYY-MM-DD string into a date, or return None if it is invalid."""
+    if not date_str or not DATE_RE.match(date_str):
+        return None
+    try:
+        return date.fromisoformat(date_str)
+    except ValueError:
+        # Well-formed but impossible, e.g. 2024-02-30
+        return None
+
+@bp.before_request
+def set_today():
+    """Resolve today's date once per request."""
+    g.today = date.today()
+
 # ==================== User Session Management ====================
 
+# Cache key for /api/user/list; cleared whenever a user is created or deleted
+USER_LIST_CACHE_KEY = 'user_list'
+
+USERNAME_RE = re.compile(r'[a-zA-Z0-9 -]+\Z')
+
 def get_current_user():
-    """Get the current user from session or None."""
-    user_id = session.get('user_id')
-    if user_id:
-        return User.query.get(user_id)
-    return None
+    """Get the current user from session or None (looked up once per request)."""
+    if 'current_user' not in g:
+        user_id = session.get('user_id')
+        g.current_user = db.session.get(User, user_id) if user_id else None
+    return g.current_user
 
 def user_required(f):
     """Decorator to require user authentication."""
@@ -25,7 +57,7 @@ def user_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return redirect(url_for('main.user_select'))
-        user = User.query.get(session['user_id'])
+        user = get_current_user()
         if not user:
             session.pop('user_id', None)
             return redirect(url_for('main.user_select'))
@@ -40,21 +72,15 @@ def user_select():
         
         # Validate username
         if not username:
-            return render_template('user_select.html', 
-                                 error='Username cannot be empty',
-                                 users=User.query.all())
+            return render_user_select(error='Username cannot be empty')
         
         # Validate length (2-20 chars)
         if len(username) < 2 or len(username) > 20:
-            return render_template('user_select.html', 
-                                 error='Username must be 2-20 characters',
-                                 users=User.query.all())
+            return render_user_select(error='Username must be 2-20 characters')
         
         # Validate characters (alphanumeric, spaces, hyphens only)
-        if not re.match(r'^[a-zA-Z0-9 -]+$', username):
-            return render_template('user_select.html', 
-                                 error='Username can only contain letters, numbers, spaces, and hyphens',
-                                 users=User.query.all())
+        if not USERNAME_RE.match(username):
+            return render_user_select(error='Username can only contain letters, numbers, spaces, and hyphens')
         
         # Check if user exists (case-insensitive)
         user = User.query.filter(db.func.lower(User.username) == username.lower()).first()
@@ -64,30 +90,40 @@ def user_select():
             user = User(username=username)
             db.session.add(user)
             db.session.commit()
+            cache.delete(USER_LIST_CACHE_KEY)
         
         # Set session
         session['user_id'] = user.id
         return redirect(url_for('main.index'))
     
     # GET request - show user selection page
+    return render_user_select()
+
+def render_user_select(error=None):
+    """Render the user selection page with the user list."""
     users = User.query.order_by(User.created_at).all()
-    return render_template('user_select.html', users=users)
+    return render_template('user_select.html', users=users, error=error)
 
 @bp.route('/api/user/current')
 def user_current():
     """Get current user info."""
-    user = get_current_user()
-    if not user:
+    user_id = session.get('user_id')
+    if not user_id:
         return jsonify({'username': None})
     
-    # Get unviewed achievement count (for badge display)
-    unviewed_count = Achievement.query.filter_by(
-        user_id=user.id,
-        viewed=False
-    ).count()
+    # Username and unviewed achievement count (for badge display) in one query;
+    # this endpoint is polled, so it skips loading the User object
+    row = db.session.query(
+        User.username, func.count(Achievement.id)
+    ).outerjoin(
+        Achievement, and_(Achievement.user_id == User.id, Achievement.viewed == False)
+    ).filter(User.id == user_id).group_by(User.id).first()
+    if not row:
+        return jsonify({'username': None})
     
+    username, unviewed_count = row
     return jsonify({
-        'username': user.username,
+        'username': username,
         'unviewed_achievements': unviewed_count
     })
 
@@ -105,9 +141,12 @@ def user_switch():
     return jsonify({'success': True, 'username': user.username})
 
 @bp.route('/api/user/list')
+@cache.cached(timeout=60, key_prefix=USER_LIST_CACHE_KEY)
 def user_list():
     """Get list of all users."""
-    users = User.query.order_by(User.created_at).all()
+    users = User.query.with_entities(
+        User.id, User.username, User.created_at
+    ).order_by(User.created_at).all()
     return jsonify({
         'users': [{
             'id': u.id,
@@ -127,6 +166,7 @@ def user_delete():
     # Delete user (cascades to habits, entries, achievements)
     db.session.delete(user)
     db.session.commit()
+    cache.delete(USER_LIST_CACHE_KEY)
     
     # Clear session
     session.pop('user_id', None)
@@ -135,27 +175,41 @@ def user_delete():
 
 # ==================== Achievement Management ====================
 
+# (name, description, emoji) per achievement key, resolved once at import
+DEFAULT_ACHIEVEMENT_META = ('Achievement', '', '🏆')
+ACHIEVEMENT_META = {
+    key: (
+        definition.get('name', DEFAULT_ACHIEVEMENT_META[0]),
+        definition.get('description', DEFAULT_ACHIEVEMENT_META[1]),
+        definition.get('emoji', DEFAULT_ACHIEVEMENT_META[2])
+    )
+    for key, definition in ACHIEVEMENT_DEFINITIONS.items()
+}
+
 @bp.route('/api/achievements/new')
 @user_required
 def achievements_new():
     """Get list of new (unnotified) achievements."""
-    from app.utils import ACHIEVEMENT_DEFINITIONS
-    
     user = get_current_user()
-    new_achievements = Achievement.query.filter_by(
+    new_achievements = Achievement.query.with_entities(
+        Achievement.achievement_key, Achievement.unlocked_at
+    ).filter_by(
         user_id=user.id,
         notified=False
     ).order_by(Achievement.unlocked_at.desc()).all()
     
-    return jsonify({
-        'achievements': [{
-            'key': a.achievement_key,
-            'name': ACHIEVEMENT_DEFINITIONS.get(a.achievement_key, {}).get('name', 'Achievement'),
-            'description': ACHIEVEMENT_DEFINITIONS.get(a.achievement_key, {}).get('description', ''),
-            'emoji': ACHIEVEMENT_DEFINITIONS.get(a.achievement_key, {}).get('emoji', '🏆'),
-            'unlocked_at': a.unlocked_at.isoformat()
-        } for a in new_achievements]
-    })
+    achievements = []
+    for key, unlocked_at in new_achievements:
+        name, description, emoji = ACHIEVEMENT_META.get(key, DEFAULT_ACHIEVEMENT_META)
+        achievements.append({
+            'key': key,
+            'name': name,
+            'description': description,
+            'emoji': emoji,
+            'unlocked_at': unlocked_at.isoformat()
+        })
+    
+    return jsonify({'achievements': achievements})
 
 @bp.route('/api/achievements/mark-viewed', methods=['POST'])
 @user_required
@@ -200,26 +254,26 @@ def achievements_mark_notified():
 def index():
     """Daily habit tracking view."""
     user = get_current_user()
-    habits = Habit.query.filter_by(user_id=user.id).order_by(Habit.order).all()
+    habits = get_user_habits(user.id)
     
     # If no habits exist, redirect to setup
     if not habits:
         return redirect(url_for('main.setup'))
     
     # Get date from query parameter or use today
-    date_str = request.args.get('date')
-    if date_str:
-        try:
-            current_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            current_date = datetime.now().date()
-    else:
-        current_date = datetime.now().date()
-    
-    # Get or create entries for this date
+    current_date = parse_date(request.args.get('date')) or g.today
+    
+    # Get or create entries for this date (single query for all habits)
+    habit_ids = [habit.id for habit in habits]
+    rows = HabitEntry.query.filter(
+        HabitEntry.habit_id.in_(habit_ids),
+        HabitEntry.date == current_date
+    ).all()
+    by_id = {row.habit_id: row for row in rows}
+
     entries = {}
     for habit in habits:
-        entry = HabitEntry.query.filter_by(habit_id=habit.id, date=current_date).first()
+        entry = by_id.get(habit.id)
         if not entry:
             entry = HabitEntry(habit_id=habit.id, date=current_date, completed=False)
         entries[habit.id] = entry
@@ -227,7 +281,6 @@ def index():
     # Calculate navigation dates
     prev_date = current_date - timedelta(days=1)
     next_date = current_date + timedelta(days=1)
-    today = datetime.now().date()
     
     return render_template('index.html', 
                          habits=habits, 
@@ -235,7 +288,7 @@ def index():
                          current_date=current_date,
                          prev_date=prev_date,
                          next_date=next_date,
-                         today=today)
+                         today=g.today)
 
 @bp.route('/setup', methods=['GET', 'POST'])
 @user_required
@@ -244,24 +297,58 @@ def setup():
     user = get_current_user()
     
     if request.method == 'POST':
-        # Delete existing habits if any (cascades to entries)
-        Habit.query.filter_by(user_id=user.id).delete()
+        # Delete existing habits and their entries in one transaction. Bulk
+        # deletes skip ORM cascades, so entries are removed explicitly.
+        habit_ids = [habit.id for habit in get_user_habits(user.id)]
+        if habit_ids:
+            HabitEntry.query.filter(HabitEntry.habit_id.in_(habit_ids)).delete(synchronize_session=False)
+        Habit.query.filter_by(user_id=user.id).delete(synchronize_session=False)
         
-        # Create 6 new habits
+        # Create 6 new habits (flushed together as one batch)
+        new_habits = []
         for i in range(1, 7):
             habit_name = request.form.get(f'habit_{i}')
             if habit_name and habit_name.strip():
-                habit = Habit(name=habit_name.strip(), order=i, user_id=user.id)
-                db.session.add(habit)
+                new_habits.append(Habit(name=habit_name.strip(), order=i, user_id=user.id))
+        db.session.add_all(new_habits)
         
+        invalidate_user_habits(user.id)
+        refresh_user_stats(user.id)
         db.session.commit()
         return redirect(url_for('main.index'))
     
     # Check if habits already exist
-    existing_habits = Habit.query.filter_by(user_id=user.id).order_by(Habit.order).all()
+    existing_habits = get_user_habits(user.id)
     
     return render_template('setup.html', existing_habits=existing_habits, user=user)
 
+def toggle_habit_entry(habit_id, date_obj):
+    """Flip (or create as completed) the entry for a habit/date and return its new state."""
+    dialect = db.engine.dialect
+    
+    # Single INSERT ... ON CONFLICT DO UPDATE ... RETURNING where supported
+    if dialect.name in UPSERT_INSERTS and dialect.insert_returning:
+        completed_col = HabitEntry.__table__.c.completed
+        stmt = UPSERT_INSERTS[dialect.name](HabitEntry).values(
+            habit_id=habit_id, date=date_obj, completed=True
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['habit_id', 'date'],
+            set_={'completed': not_(func.coalesce(completed_col, False))}
+        ).returning(completed_col)
+        return db.session.execute(stmt).scalar_one()
+    
+    # Fallback: get or create entry
+    entry = HabitEntry.query.filter_by(habit_id=habit_id, date=date_obj).first()
+    
+    if not entry:
+        entry = HabitEntry(habit_id=habit_id, date=date_obj, completed=True)
+        db.session.add(entry)
+    else:
+        entry.completed = not entry.completed
+    
+    return entry.completed
+
 @bp.route('/api/toggle', methods=['POST'])
 @user_required
 def toggle_entry():
@@ -276,28 +363,21 @@ def toggle_entry():
     if not habit:
         return jsonify({'error': 'Habit not found'}), 404
     
-    try:
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-    except ValueError:
+    date_obj = parse_date(date_str)
+    if not date_obj:
         return jsonify({'error': 'Invalid date format'}), 400
     
-    # Get or create entry
-    entry = HabitEntry.query.filter_by(habit_id=habit_id, date=date_obj).first()
-    
-    if not entry:
-        entry = HabitEntry(habit_id=habit_id, date=date_obj, completed=True)
-        db.session.add(entry)
-    else:
-        entry.completed = not entry.completed
+    completed = toggle_habit_entry(habit_id, date_obj)
+    refresh_user_stats(user.id)
     
+    # Check for new achievements against the uncommitted toggle, then commit
+    # the entry and any unlocks together
+    new_achievements = check_achievements(user.id, commit=False)
     db.session.commit()
     
-    # Check for new achievements
-    new_achievements = check_achievements(user.id)
-    
     return jsonify({
         'success': True,
-        'completed': entry.completed,
+        'completed': completed,
         'habit_id': habit_id,
         'date': date_str,
         'new_achievements': new_achievements
@@ -307,16 +387,14 @@ def toggle_entry():
 @user_required
 def stats():
     """Statistics dashboard."""
-    from .utils import get_unlocked_achievements, get_locked_with_progress, get_achievement_tooltip
-    
     user = get_current_user()
-    habits = Habit.query.filter_by(user_id=user.id).order_by(Habit.order).all()
+    habits = get_user_habits(user.id)
     
     if not habits:
         return redirect(url_for('main.setup'))
     
-    overall_stats = get_overall_stats(habits, user.id)
-    week_day_stats = get_week_day_stats(habits)
+    overall_stats = get_user_overall_stats(user.id)
+    week_day_stats = get_week_day_stats(user.id)
     
     return render_template('stats.html', 
                          overall_stats=overall_stats,
@@ -331,86 +409,119 @@ def stats():
 def calendar():
     """21-day calendar overview."""
     user = get_current_user()
-    habits = Habit.query.filter_by(user_id=user.id).order_by(Habit.order).all()
+    habits = get_user_habits(user.id)
     
     if not habits:
         return redirect(url_for('main.setup'))
     
     # Get the start date (first entry or 21 days ago)
-    first_entry = HabitEntry.query.join(Habit).filter(
-        Habit.user_id == user.id
-    ).order_by(HabitEntry.date).first()
+    habit_ids = [habit.id for habit in habits]
+    first_date = db.session.query(func.min(HabitEntry.date)).filter(
+        HabitEntry.habit_id.in_(habit_ids)
+    ).scalar()
     
-    if first_entry:
-        start_date = first_entry.date
+    if first_date:
+        start_date = first_date
     else:
-        start_date = datetime.now().date() - timedelta(days=20)
+        start_date = g.today - timedelta(days=20)
     
     # Generate 21-day range
     dates = get_date_range_for_challenge(start_date, 21)
+    date_keys = [(date, date.isoformat()) for date in dates]
+    
+    # Fetch every entry in the 21-day window with a single query
+    rows = HabitEntry.query.with_entities(
+        HabitEntry.habit_id, HabitEntry.date, HabitEntry.completed
+    ).filter(
+        HabitEntry.habit_id.in_(habit_ids),
+        HabitEntry.date.between(dates[0], dates[-1])
+    ).all()
+    lookup = {(habit_id, date): completed for habit_id, date, completed in rows}
     
     # Build calendar data structure
     calendar_data = []
     for habit in habits:
-        habit_row = {
+        calendar_data.append({
             'habit': habit,
-            'entries': {}
-        }
-        
-        for date in dates:
-            entry = HabitEntry.query.filter_by(habit_id=habit.id, date=date).first()
-            habit_row['entries'][date.isoformat()] = entry.completed if entry else False
-        
-        calendar_data.append(habit_row)
+            'entries': {
+                date_key: lookup.get((habit.id, date), False)
+                for date, date_key in date_keys
+            }
+        })
     
     return render_template('calendar.html', 
                          calendar_data=calendar_data, 
                          dates=dates,
-                         today=datetime.now().date())
+                         today=g.today)
+
+def gzip_stream(chunks, compresslevel=6):
+    """Gzip an iterable of byte chunks incrementally."""
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
 
 @bp.route('/export')
 @user_required
 def export_data():
-    """Export all habit data as JSON."""
+    """Export all habit data as JSON, streamed one habit at a time."""
     user = get_current_user()
-    habits = Habit.query.filter_by(user_id=user.id).order_by(Habit.order).all()
-    
-    export_data = {
-        'export_date': datetime.now().isoformat(),
-        'username': user.username,
-        'habits': []
-    }
+    habits = get_user_habits(user.id)
+    username = user.username
+    # Compact by default; ?pretty=1 indents each habit block for humans
+    dump_option = orjson.OPT_INDENT_2 if request.args.get('pretty') == '1' else 0
+    
+    # Only date/completed are needed, so read plain rows in one query, ordered
+    # to match `habits` and fetched in batches so the full set is never in memory
+    entry_rows = HabitEntry.query.with_entities(
+        HabitEntry.habit_id, HabitEntry.date, HabitEntry.completed
+    ).join(Habit).filter(
+        Habit.user_id == user.id
+    ).order_by(Habit.order, Habit.id, HabitEntry.date).yield_per(200)
     
-    for habit in habits:
-        habit_data = {
-            'id': habit.id,
-            'name': habit.name,
-            'order': habit.order,
-            'created_at': habit.created_at.isoformat(),
-            'stats': get_habit_stats(habit),
-            'entries': []
-        }
+    def generate():
+        yield b'{"export_date":' + orjson.dumps(datetime.now().isoformat())
+        yield b',"username":' + orjson.dumps(username) + b',"habits":['
         
-        for entry in sorted(habit.entries, key=lambda x: x.date):
-            habit_data['entries'].append({
-                'date': entry.date.isoformat(),
-                'completed': entry.completed
-            })
+        groups = groupby(entry_rows, key=attrgetter('habit_id'))
+        pending = next(groups, None)
+        for i, habit in enumerate(habits):
+            entries = []
+            if pending and pending[0] == habit.id:
+                entries = list(pending[1])
+                pending = next(groups, None)
+            
+            habit_data = {
+                'id': habit.id,
+                'name': habit.name,
+                'order': habit.order,
+                'created_at': habit.created_at.isoformat(),
+                'stats': get_habit_stats(habit, entries=entries),
+                'entries': [{
+                    'date': entry.date.isoformat(),
+                    'completed': entry.completed
+                } for entry in entries]
+            }
+            yield (b',' if i else b'') + orjson.dumps(habit_data, option=dump_option)
         
-        export_data['habits'].append(habit_data)
-    
-    # Create JSON file in memory
-    json_str = json.dumps(export_data, indent=2)
-    json_bytes = io.BytesIO(json_str.encode('utf-8'))
-    
-    filename = f'habit_tracker_{user.username}_{datetime.now().strftime("%Y%m%d")}.json'
-    
-    return send_file(
-        json_bytes,
-        mimetype='application/json',
-        as_attachment=True,
-        download_name=filename
-    )
+        yield b']}'
+    
+    filename = f'habit_tracker_{username}_{datetime.now().strftime("%Y%m%d")}.json'
+    
+    body = generate()
+    use_gzip = request.accept_encodings['gzip'] > 0
+    if use_gzip:
+        body = gzip_stream(body)
+    
+    response = Response(stream_with_context(body), mimetype='application/json')
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    response.vary.add('Accept-Encoding')
+    if use_gzip:
+        # Transfer encoding only: browsers decompress it and save plain .json
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 
 @bp.route('/import', methods=['POST'])
@@ -427,12 +538,14 @@ def reset_challenge():
     """Reset and start a new 21-day challenge."""
     user = get_current_user()
     
-    # Delete all entries for this user's habits
-    HabitEntry.query.filter(
-        HabitEntry.habit_id.in_(
-            db.session.query(Habit.id).filter_by(user_id=user.id)
-        )
-    ).delete(synchronize_session=False)
+    # Delete all entries for this user's habits (a literal IN list of the
+    # request's cached habit IDs keeps the DELETE a plain index lookup)
+    habit_ids = [habit.id for habit in get_user_habits(user.id)]
+    if habit_ids:
+        HabitEntry.query.filter(
+            HabitEntry.habit_id.in_(habit_ids)
+        ).delete(synchronize_session=False)
+    refresh_user_stats(user.id)
     
     db.session.commit()
     
@@ -450,8 +563,6 @@ def fix_achievements_page():
 @user_required
 def fix_achievement_dates():
     """Recalculate and fix achievement unlock dates for current user."""
-    from app.utils import get_achievement_unlock_date, ACHIEVEMENT_DEFINITIONS
-    
     user = get_current_user()
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -459,12 +570,13 @@ def fix_achievement_dates():
     # Get all achievements for this user
     achievements = Achievement.query.filter_by(user_id=user.id).all()
     
+    # Recalculate the correct unlock dates (one sweep for all of them)
+    new_dates = get_achievement_unlock_dates(user.id, [a.achievement_key for a in achievements])
+    
     updated = []
     for achievement in achievements:
         old_date = achievement.unlocked_at
-        
-        # Recalculate the correct unlock date
-        new_date = get_achievement_unlock_date(user.id, achievement.achievement_key)
+        new_date = new_dates[achievement.achievement_key]
         
         # Get achievement name for display
         definition = ACHIEVEMENT_DEFINITIONS.get(achievement.achievement_key, {})
@@ -488,33 +600,42 @@ def fix_achievement_dates():
         'count': len(updated)
     })
 
+# The manifest never changes at runtime, so serialize it once at import
+MANIFEST = {
+    'name': '21-Day Habit Tracker',
+    'short_name': 'Habits',
+    'description': 'Track 6 habits for 21 days',
+    'start_url': '/',
+    'display': 'standalone',
+    'background_color': '#ffffff',
+    'theme_color': '#4CAF50',
+    'icons': [
+        {
+            'src': '/static/icons/icon-192.png',
+            'sizes': '192x192',
+            'type': 'image/png'
+        },
+        {
+            'src': '/static/icons/icon-512.png',
+            'sizes': '512x512',
+            'type': 'image/png'
+        }
+    ]
+}
+MANIFEST_BYTES = json.dumps(MANIFEST).encode('utf-8')
+
 @bp.route('/manifest.json')
 def manifest():
     """Serve PWA manifest."""
-    return jsonify({
-        'name': '21-Day Habit Tracker',
-        'short_name': 'Habits',
-        'description': 'Track 6 habits for 21 days',
-        'start_url': '/',
-        'display': 'standalone',
-        'background_color': '#ffffff',
-        'theme_color': '#4CAF50',
-        'icons': [
-            {
-                'src': '/static/icons/icon-192.png',
-                'sizes': '192x192',
-                'type': 'image/png'
-            },
-            {
-                'src': '/static/icons/icon-512.png',
-                'sizes': '512x512',
-                'type': 'image/png'
-            }
-        ]
-    })
+    response = Response(MANIFEST_BYTES, mimetype='application/json')
+    # Not fingerprinted (browsers request it by a fixed URL), so cache for a day
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
 
 @bp.route('/sw.js')
 def service_worker():
     """Serve service worker."""
+    # Deliberately left revalidating (ETag + no-cache) so SW updates roll out
     return send_file('static/service-worker.js', mimetype='application/javascript')
 
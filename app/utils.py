@@ -1,73 +1,112 @@
 from datetime import datetime, timedelta
 from collections import defaultdict
-from app.models import HabitEntry, Habit
+from itertools import groupby
+from operator import attrgetter, itemgetter
+from flask import g
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import HabitEntry, Habit, Achievement, UserStats
 from app import db
 
-def calculate_current_streak(habit_entries):
-    """Calculate current streak counting backwards from yesterday (today never affects streak)."""
-    if not habit_entries:
-        return 0
-    
-    # Sort entries by date descending
-    sorted_entries = sorted(habit_entries, key=lambda x: x.date, reverse=True)
-    
-    today = datetime.now().date()
-    
-    streak = 0
-    # Always start from yesterday - today never counts for or against the streak
-    expected_date = today - timedelta(days=1)
-    
-    for entry in sorted_entries:
-        if entry.date == expected_date and entry.completed:
-            streak += 1
-            expected_date -= timedelta(days=1)
-        elif entry.date < expected_date:
-            # There's a gap, streak is broken
-            break
+# Dialects with INSERT ... ON CONFLICT support, used for upserts
+UPSERT_INSERTS = {
+    'sqlite': sqlite_insert,
+    'postgresql': postgresql_insert,
+}
+
+def get_user_habits(user_id):
+    """Get a user's habits ordered by position, memoized for the current request.
     
-    return streak
+    Habit rows are bound to the request's database session, so they are cached
+    on flask.g rather than across requests.
+    """
+    cache = g.setdefault('user_habits', {})
+    if user_id not in cache:
+        cache[user_id] = Habit.query.filter_by(user_id=user_id).order_by(Habit.order, Habit.id).all()
+    return cache[user_id]
+
+def invalidate_user_habits(user_id):
+    """Drop the memoized habit list after a user's habits change."""
+    g.get('user_habits', {}).pop(user_id, None)
+    invalidate_user_stats(user_id)
 
-def calculate_longest_streak(habit_entries):
-    """Calculate the longest streak ever achieved."""
+def invalidate_user_stats(user_id):
+    """Drop the request's memoized aggregates and stats after a user's entries change."""
+    for name in ('habit_aggregates', 'overall_stats', 'achievement_stats'):
+        g.get(name, {}).pop(user_id, None)
+
+def compute_streaks(habit_entries, today=None):
+    """Get (current_streak, longest_streak) in one pass over date-ordered entries.
+    
+    The current streak counts back from yesterday (today never affects it);
+    the longest streak covers every entry.
+    """
     if not habit_entries:
-        return 0
+        return 0, 0
     
-    # Sort entries by date
-    sorted_entries = sorted(habit_entries, key=lambda x: x.date)
+    if today is None:
+        today = datetime.now().date()
+    # Dates are compared as day ordinals to keep timedelta math out of the loop
+    yesterday = today.toordinal() - 1
     
-    max_streak = 0
-    current_streak = 0
-    prev_date = None
+    current = 0
+    longest = 0
+    run = 0
+    prev_day = None
     
-    for entry in sorted_entries:
+    for entry in habit_entries:
+        day = entry.date.toordinal()
         if entry.completed:
-            if prev_date is None or (entry.date - prev_date).days == 1:
-                current_streak += 1
-            else:
-                current_streak = 1
-            max_streak = max(max_streak, current_streak)
-            prev_date = entry.date
+            run = run + 1 if prev_day is not None and day - prev_day == 1 else 1
+            if run > longest:
+                longest = run
+            if day == yesterday:
+                current = run
         else:
-            current_streak = 0
-            prev_date = entry.date
+            run = 0
+        prev_day = day
     
-    return max_streak
+    return current, longest
 
-def calculate_completion_rate(habit_entries, start_date, global_challenge_start_date=None):
+def calculate_completion_rate(habit_entries, start_date, global_challenge_start_date=None, today=None):
     """Calculate completion percentage with dual percentages (tracked vs challenge).
     
     Args:
         habit_entries: List of HabitEntry objects for a habit
         start_date: Date when habit tracking started (habit.created_at.date())
         global_challenge_start_date: Optional global start date for the entire challenge
+        today: Optional date to measure up to (defaults to the current date)
     
     Returns:
         Dict with tracked and challenge completion stats
     """
     if not habit_entries:
+        return calculate_completion_rate_from_counts(0, 0, start_date, None, global_challenge_start_date, today)
+    
+    completed = sum(1 for entry in habit_entries if entry.completed)
+    earliest_entry_date = min(entry.date for entry in habit_entries)
+    return calculate_completion_rate_from_counts(
+        completed, len(habit_entries), start_date, earliest_entry_date, global_challenge_start_date, today
+    )
+
+def calculate_completion_rate_from_counts(completed, tracked_total, start_date, earliest_entry_date,
+                                          global_challenge_start_date=None, today=None):
+    """Same as calculate_completion_rate, but from pre-computed entry counts.
+    
+    Args:
+        completed: Number of completed entries
+        tracked_total: Number of entries
+        start_date: Date when habit tracking started (habit.created_at.date())
+        earliest_entry_date: Date of the habit's first entry (None if it has none)
+        global_challenge_start_date: Optional global start date for the entire challenge
+        today: Optional date to measure up to (defaults to the current date)
+    """
+    if today is None:
+        today = datetime.now().date()
+    
+    if not tracked_total:
         # If no entries but we have a global start date, calculate challenge days from that
         if global_challenge_start_date:
-            today = datetime.now().date()
             challenge_days = (today - global_challenge_start_date).days + 1
             challenge_days = max(1, challenge_days)
         else:
@@ -83,8 +122,6 @@ def calculate_completion_rate(habit_entries, start_date, global_challenge_start_
         }
     
     # Tracked percentage (of days that were tracked)
-    completed = sum(1 for entry in habit_entries if entry.completed)
-    tracked_total = len(habit_entries)
     tracked_percent = round((completed / tracked_total) * 100, 1) if tracked_total > 0 else 0.0
     
     # Challenge percentage - use global start date if provided, otherwise use earliest entry
@@ -92,10 +129,8 @@ def calculate_completion_rate(habit_entries, start_date, global_challenge_start_
         actual_start_date = global_challenge_start_date
     else:
         # Fallback to earliest entry date for this habit
-        earliest_entry_date = min(entry.date for entry in habit_entries)
         actual_start_date = min(start_date, earliest_entry_date)
     
-    today = datetime.now().date()
     # Count all days from actual start to today (inclusive)
     challenge_days = (today - actual_start_date).days + 1  # +1 to include start date
     challenge_days = max(1, challenge_days)  # Ensure at least 1 day
@@ -110,88 +145,168 @@ def calculate_completion_rate(habit_entries, start_date, global_challenge_start_
         'challenge_percent': challenge_percent
     }
 
-def get_perfect_days(user_id):
-    """Count days where all 6 habits were completed."""
-    # Get all habits for user
-    habit_ids = [h.id for h in Habit.query.filter_by(user_id=user_id).all()]
+def get_daily_completion_counts(user_id):
+    """Get (date, completed_count) for every date the user has entries, in one query."""
+    habit_ids = [h.id for h in get_user_habits(user_id)]
+    if not habit_ids:
+        return []
     
-    if len(habit_ids) != 6:
-        return 0
+    # Filtering on the habit IDs (rather than joining Habit) lets the planner
+    # read everything from the (habit_id, date, completed) covering index
+    return db.session.query(
+        HabitEntry.date,
+        db.func.sum(db.case((HabitEntry.completed.is_(True), 1), else_=0))
+    ).filter(
+        HabitEntry.habit_id.in_(habit_ids)
+    ).group_by(HabitEntry.date).all()
+
+def count_day_stats(user_id):
+    """Get (perfect_days, almost_perfect_days, days_active) with one aggregate query.
+    
+    Buckets the per-date completion counts in SQL, so only three numbers come back.
+    """
+    habit_ids = [h.id for h in get_user_habits(user_id)]
+    if not habit_ids:
+        return 0, 0, 0
     
-    # Get all dates with entries
-    dates_with_entries = db.session.query(HabitEntry.date).filter(
+    daily = db.session.query(
+        db.func.sum(db.case((HabitEntry.completed.is_(True), 1), else_=0)).label('completed')
+    ).filter(
         HabitEntry.habit_id.in_(habit_ids)
-    ).distinct().all()
-    
-    perfect_count = 0
-    for (date,) in dates_with_entries:
-        # Check if all 6 habits were completed on this date
-        completed = db.session.query(db.func.count(HabitEntry.id)).filter(
-            HabitEntry.habit_id.in_(habit_ids),
-            HabitEntry.date == date,
-            HabitEntry.completed == True
-        ).scalar()
-        
-        if completed == 6:
-            perfect_count += 1
+    ).group_by(HabitEntry.date).subquery()
     
-    return perfect_count
-
-def get_almost_perfect_days(user_id):
-    """Count days where exactly 5 out of 6 habits were completed."""
-    # Get all habits for user
-    habit_ids = [h.id for h in Habit.query.filter_by(user_id=user_id).all()]
+    perfect, almost_perfect, active = db.session.query(
+        db.func.sum(db.case((daily.c.completed == 6, 1), else_=0)),
+        db.func.sum(db.case((daily.c.completed == 5, 1), else_=0)),
+        db.func.count()
+    ).select_from(daily).one()
     
+    # Perfect and almost-perfect days only apply to the full 6-habit challenge
     if len(habit_ids) != 6:
-        return 0
+        return 0, 0, active
+    return perfect or 0, almost_perfect or 0, active
+
+def get_user_day_stats(user_id):
+    """Get (perfect_days, almost_perfect_days, days_active) for a user.
+    
+    Reads the UserStats row kept current by refresh_user_stats, falling back to
+    count_day_stats for users whose row hasn't been written yet (`init-db`
+    backfills rows for existing users).
+    """
+    row = db.session.query(
+        UserStats.perfect_days, UserStats.almost_perfect_days, UserStats.days_active
+    ).filter(UserStats.user_id == user_id).first()
+    if row is not None:
+        return tuple(row)
+    return count_day_stats(user_id)
+
+def refresh_user_stats(user_id):
+    """Recompute a user's UserStats row; call after changing their entries or habits.
+    
+    Runs in the caller's transaction, so the row commits with the change it reflects.
+    Also drops the request's memoized stats, which the change made stale.
+    """
+    invalidate_user_stats(user_id)
+    
+    # Lock the row before counting, so concurrent writes for the same user recount
+    # one after the other (each seeing the other's committed entries) instead of
+    # the later one saving counts that miss the earlier one's entry
+    locked_row = UserStats.query.filter_by(user_id=user_id).with_for_update().populate_existing()
+    stats = locked_row.one_or_none()
+    if stats is None:
+        dialect = db.engine.dialect
+        if dialect.name in UPSERT_INSERTS:
+            # Another request may be creating the row too; let one insert win
+            stmt = UPSERT_INSERTS[dialect.name](UserStats).values(user_id=user_id)
+            db.session.execute(stmt.on_conflict_do_nothing(index_elements=['user_id']))
+            stats = locked_row.one()
+        else:
+            stats = UserStats(user_id=user_id)
+            db.session.add(stats)
     
-    # Get all dates with entries
-    dates_with_entries = db.session.query(HabitEntry.date).filter(
+    stats.perfect_days, stats.almost_perfect_days, stats.days_active = count_day_stats(user_id)
+    stats.updated_at = datetime.utcnow()
+
+def get_habit_aggregates(user_id):
+    """Get {habit_id: (total, completed, earliest_date)} for all of a user's habits in one query.
+    
+    Habits without entries are left out. Memoized for the current request.
+    """
+    cache = g.setdefault('habit_aggregates', {})
+    if user_id in cache:
+        return cache[user_id]
+    
+    habit_ids = [h.id for h in get_user_habits(user_id)]
+    if not habit_ids:
+        cache[user_id] = {}
+        return cache[user_id]
+    
+    rows = db.session.query(
+        HabitEntry.habit_id,
+        db.func.count(HabitEntry.id),
+        db.func.sum(db.case((HabitEntry.completed.is_(True), 1), else_=0)),
+        db.func.min(HabitEntry.date)
+    ).filter(
         HabitEntry.habit_id.in_(habit_ids)
-    ).distinct().all()
-    
-    almost_perfect_count = 0
-    for (date,) in dates_with_entries:
-        # Check if exactly 5 habits were completed on this date
-        completed = db.session.query(db.func.count(HabitEntry.id)).filter(
-            HabitEntry.habit_id.in_(habit_ids),
-            HabitEntry.date == date,
-            HabitEntry.completed == True
-        ).scalar()
-        
-        if completed == 5:
-            almost_perfect_count += 1
+    ).group_by(HabitEntry.habit_id).all()
     
-    return almost_perfect_count
+    cache[user_id] = {habit_id: (total, completed, earliest) for habit_id, total, completed, earliest in rows}
+    return cache[user_id]
 
-def get_days_active(user_id):
-    """Count total unique days with at least one habit entry."""
-    habit_ids = [h.id for h in Habit.query.filter_by(user_id=user_id).all()]
+def get_habit_entry_rows(user_id):
+    """Get {habit_id: [(habit_id, date, completed), ...]} in date order, in one query.
     
+    Lighter than loading habit.entries when only dates and completion are read.
+    """
+    entries_by_habit = defaultdict(list)
+    habit_ids = [h.id for h in get_user_habits(user_id)]
     if not habit_ids:
-        return 0
+        return entries_by_habit
     
-    unique_days = db.session.query(db.func.count(db.func.distinct(HabitEntry.date))).filter(
+    rows = db.session.query(
+        HabitEntry.habit_id, HabitEntry.date, HabitEntry.completed
+    ).filter(
         HabitEntry.habit_id.in_(habit_ids)
-    ).scalar()
+    ).order_by(HabitEntry.habit_id, HabitEntry.date).all()
     
-    return unique_days or 0
+    for row in rows:
+        entries_by_habit[row.habit_id].append(row)
+    return entries_by_habit
 
-
-
-def get_habit_stats(habit, global_challenge_start_date=None):
+def get_habit_stats(habit, global_challenge_start_date=None, entries=None, today=None):
     """Get comprehensive statistics for a habit.
     
     Args:
         habit: Habit object
         global_challenge_start_date: Optional global start date for challenge calculations
+        entries: Optional pre-fetched entries in date order (anything with .date
+            and .completed); defaults to habit.entries
+        today: Optional current date, so callers handling many habits compute it once
     """
-    entries = habit.entries
-    completion_data = calculate_completion_rate(entries, habit.created_at.date(), global_challenge_start_date)
+    if entries is None:
+        entries = habit.entries
+    completion_data = calculate_completion_rate(entries, habit.created_at.date(), global_challenge_start_date, today)
+    return build_habit_stats(entries, completion_data, today)
+
+def get_habit_stats_from_agg(habit, total, completed, earliest_entry_date, global_challenge_start_date=None,
+                             entries=None, today=None):
+    """Get habit statistics from get_habit_aggregates counts.
     
+    Only the streaks walk the entries (habit.entries unless entries is given).
+    """
+    if entries is None:
+        entries = habit.entries
+    completion_data = calculate_completion_rate_from_counts(
+        completed, total, habit.created_at.date(), earliest_entry_date, global_challenge_start_date, today
+    )
+    return build_habit_stats(entries, completion_data, today)
+
+def build_habit_stats(entries, completion_data, today=None):
+    """Combine streaks and completion data into the habit stats dict."""
+    current_streak, longest_streak = compute_streaks(entries, today)
     return {
-        'current_streak': calculate_current_streak(entries),
-        'longest_streak': calculate_longest_streak(entries),
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
         'completion_rate': completion_data['tracked_percent'],  # For backwards compatibility
         'tracked_completed': completion_data['tracked_completed'],
         'tracked_total': completion_data['tracked_total'],
@@ -201,15 +316,21 @@ def get_habit_stats(habit, global_challenge_start_date=None):
         'challenge_percent': completion_data['challenge_percent']
     }
 
-def get_overall_stats(habits, user_id):
-    """Get overall statistics across all habits."""
+def get_overall_stats(habits, user_id, aggregates=None, today=None):
+    """Get overall statistics across all habits.
+    
+    Counts come from get_habit_aggregates (pass them in if already fetched) and
+    streaks from get_habit_entry_rows, so habit.entries is never loaded.
+    """
+    if aggregates is None:
+        aggregates = get_habit_aggregates(user_id)
+    if today is None:
+        today = datetime.now().date()
+    entries_by_habit = get_habit_entry_rows(user_id)
+    
     # Find the global challenge start date (earliest entry across ALL habits)
-    global_challenge_start_date = None
-    for habit in habits:
-        if habit.entries:
-            earliest_for_habit = min(entry.date for entry in habit.entries)
-            if global_challenge_start_date is None or earliest_for_habit < global_challenge_start_date:
-                global_challenge_start_date = earliest_for_habit
+    earliest_dates = [aggregates[habit.id][2] for habit in habits if habit.id in aggregates]
+    global_challenge_start_date = min(earliest_dates) if earliest_dates else None
     
     total_entries = 0
     total_completed = 0
@@ -218,25 +339,26 @@ def get_overall_stats(habits, user_id):
     
     for habit in habits:
         # Pass the global challenge start date to each habit
-        stats = get_habit_stats(habit, global_challenge_start_date)
+        total, completed, earliest = aggregates.get(habit.id, (0, 0, None))
+        stats = get_habit_stats_from_agg(habit, total, completed, earliest, global_challenge_start_date,
+                                         entries=entries_by_habit.get(habit.id, []), today=today)
         habit_stats.append({
             'habit': habit,
-            'stats': stats
+            'stats': stats,
+            'rate': stats['challenge_percent']
         })
         total_entries += stats['tracked_total']
         total_completed += stats['challenge_completed']
         total_challenge_days += stats['challenge_days']
     
     # Sort habits by completion rate
-    habit_stats.sort(key=lambda x: x['stats']['challenge_percent'], reverse=True)
+    habit_stats.sort(key=itemgetter('rate'), reverse=True)
     
     # Overall rate based on challenge days (total possible), not just tracked days
     overall_rate = round((total_completed / total_challenge_days * 100), 1) if total_challenge_days > 0 else 0.0
     
     # Get new metrics
-    perfect_days = get_perfect_days(user_id)
-    almost_perfect_days = get_almost_perfect_days(user_id)
-    days_active = get_days_active(user_id)
+    perfect_days, almost_perfect_days, days_active = get_user_day_stats(user_id)
     
     return {
         'overall_completion_rate': overall_rate,
@@ -251,6 +373,16 @@ def get_overall_stats(habits, user_id):
     }
 
 
+def get_user_overall_stats(user_id):
+    """get_overall_stats for a user's habits, memoized for the current request.
+    
+    The stats page and the achievement stats both read it.
+    """
+    cache = g.setdefault('overall_stats', {})
+    if user_id not in cache:
+        cache[user_id] = get_overall_stats(get_user_habits(user_id), user_id, get_habit_aggregates(user_id))
+    return cache[user_id]
+
 def get_date_range_for_challenge(start_date, days=21):
     """Get list of dates for the challenge period."""
     dates = []
@@ -258,120 +390,105 @@ def get_date_range_for_challenge(start_date, days=21):
         dates.append(start_date + timedelta(days=i))
     return dates
 
-def get_week_day_stats(habits):
+# Indexed by date.weekday(); fixed English names to match the stats template
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+def get_week_day_stats(user_id):
     """Calculate which day of the week has best completion rate.
     
     For each unique date across all habits, calculates what percentage of habits
-    were completed on that date.
+    were completed on that date. Completions are counted per date in SQL.
     """
-    if not habits:
+    num_habits = len(get_user_habits(user_id))
+    if not num_habits:
         return {}
     
-    num_habits = len(habits)
-    
-    # Get all unique dates that have entries
-    all_dates = set()
-    for habit in habits:
-        for entry in habit.entries:
-            all_dates.add(entry.date)
+    # Group dates by day of week (Monday=0 .. Sunday=6)
+    completed = [0] * 7
+    possible = [0] * 7
     
-    # Group dates by day of week
-    day_stats = defaultdict(lambda: {'completed': 0, 'possible': 0})
+    for date, completed_count in get_daily_completion_counts(user_id):
+        weekday = date.weekday()
+        completed[weekday] += completed_count
+        possible[weekday] += num_habits
     
-    for date in all_dates:
-        day_name = date.strftime('%A')
-        
-        # For this date, count how many habits were completed
-        completed_count = 0
-        for habit in habits:
-            # Check if this habit has an entry for this date and it's completed
-            for entry in habit.entries:
-                if entry.date == date and entry.completed:
-                    completed_count += 1
-                    break
-        
-        day_stats[day_name]['completed'] += completed_count
-        day_stats[day_name]['possible'] += num_habits
-    
-    # Calculate percentages
+    # Calculate percentages for the days that have entries
     day_percentages = {}
-    for day, stats in day_stats.items():
-        if stats['possible'] > 0:
-            day_percentages[day] = round((stats['completed'] / stats['possible']) * 100, 1)
-        else:
-            day_percentages[day] = 0.0
+    for weekday in range(7):
+        if possible[weekday] > 0:
+            day_percentages[DAY_NAMES[weekday]] = round((completed[weekday] / possible[weekday]) * 100, 1)
     
     return day_percentages
 
 
+# Detailed explanation per achievement, shown in tooltips
+ACHIEVEMENT_TOOLTIPS = {
+    # Milestones
+    'first_habit': 'Your journey begins! This unlocks when you mark your very first habit as complete on any day.',
+    'day_1': 'Track at least one habit on your first day. This shows you\'ve started building your routine.',
+    'perfect_day_1': 'Complete all 6 habits on the same day. This is your first perfect day - every habit done!',
+    'habits_5': 'Mark any 5 habits as complete (across any days). Small steps add up!',
+    'habits_10': 'Complete 10 habits total. You\'re building momentum!',
+    'day_3': 'Be active for 3 different days (doesn\'t need to be consecutive). Consistency is forming!',
+    'habits_25': 'Reach 25 total completed habits. You\'re getting serious about your goals!',
+    'week_1': 'Track habits on 7 different days. You\'ve been active for a full week!',
+    'habits_50': 'Hit 50 total habit completions. Halfway to 100!',
+    'perfect_days_5': 'Achieve 5 days where you complete all 6 habits. Excellence is becoming a habit!',
+    'day_14': 'Be active for 14 different days. Two weeks of staying engaged!',
+    'habits_75': 'Complete 75 habits in total. You\'re a habit-building machine!',
+    'perfect_days_10': 'Reach 10 perfect days (all 6 habits completed). Consistency meets excellence!',
+    'habits_100': 'Complete 100 habits! A major milestone showing dedication.',
+    'day_21': 'Be active for all 21 days of the challenge. You made it through the entire journey!',
+    'perfect_days_15': '15 perfect days achieved. You\'re mastering your routine!',
+    'habits_126': 'Complete all 126 possible habits (6 habits × 21 days). Absolute perfection!',
+    'perfect_days_21': 'All 21 days perfect! Every single habit done every single day. Ultimate achievement!',
+    
+    # Streaks
+    'streak_2': 'Complete at least one habit for 2 days in a row (streak of consecutive days).',
+    'streak_3': 'Build a 3-day streak - 3 consecutive days with at least one completed habit.',
+    'streak_5': 'Maintain a 5-day streak. Consistency is building!',
+    'streak_7': 'A full week of consecutive days! 7 days in a row with completed habits.',
+    'streak_10': '10 days in a row! Your longest ever streak hits double digits.',
+    'streak_14': '14 consecutive days - two full weeks! Your commitment is showing.',
+    'streak_21': '21 days in a row - the full challenge as a perfect streak!',
+    'current_streak_3': 'Your current active streak is 3 days. Keep it going!',
+    'current_streak_5': 'Currently on a 5-day streak. Don\'t break it now!',
+    'current_streak_7': 'A week-long active streak! You\'re on fire right now.',
+    'current_streak_10': '10 days and counting! Your current streak is impressive.',
+    'current_streak_14': 'Two weeks of current streak! Momentum is strong.',
+    'current_streak_21': '21-day active streak! You\'re currently perfect.',
+    'all_habits_streak_3': 'Every single one of your habits has at least a 3-day streak. All cylinders firing!',
+    'all_habits_streak_7': 'All 6 habits with 7+ day streaks each. Complete synchronization!',
+    
+    # Excellence
+    'completion_50': 'Your overall success rate reaches 50% - half of all possible habits completed since you started.',
+    'completion_75': '75% overall success rate. You\'re hitting three-quarters of your daily goals!',
+    'completion_90': '90% success rate! Nearly perfect across all your tracked days.',
+    'completion_100': '100% success rate - every single habit you could have done, you did!',
+    'best_habit_100': 'One of your habits has 100% success rate - you\'ve never missed it since tracking started!',
+    'all_habits_50': 'Every single habit is above 50% success rate. No weak spots in your routine!',
+    'all_habits_75': 'All habits above 75% - your entire routine is strong!',
+    'almost_perfect_5': '5 days where you completed 5 out of 6 habits. So close to perfect!',
+    'almost_perfect_10': '10 almost-perfect days (5/6 habits). Consistent excellence!',
+    'high_performer': '15 total days of either perfect (6/6) or almost perfect (5/6). You\'re crushing it!',
+    
+    # Recovery
+    'comeback_kid': 'You came back after missing a day. Setbacks don\'t stop you!',
+    'persistent': 'Active for 7+ days but with breaks in between. You keep coming back!',
+    'resilient': 'Reached 14 active days despite not having a 14-day streak. You recover from setbacks!',
+    'phoenix': 'Built a 5-day streak after breaking a previous streak. Rising from the ashes!',
+    'determined': 'Hit 50% success rate even without many perfect days. Steady wins the race!',
+    'grinder': '21 active days but fewer than 10 were perfect. You grind through the tough days!',
+    'never_quit': '21 days active but not all consecutive. You never gave up despite interruptions!',
+}
+
 def get_achievement_tooltip(achievement_key, definition, progress=None):
     """Generate a detailed tooltip for an achievement that explains what it means."""
     name = definition['name']
     desc = definition['description']
     category = definition['category']
     
-    # Create detailed explanations
-    tooltips = {
-        # Milestones
-        'first_habit': 'Your journey begins! This unlocks when you mark your very first habit as complete on any day.',
-        'day_1': 'Track at least one habit on your first day. This shows you\'ve started building your routine.',
-        'perfect_day_1': 'Complete all 6 habits on the same day. This is your first perfect day - every habit done!',
-        'habits_5': 'Mark any 5 habits as complete (across any days). Small steps add up!',
-        'habits_10': 'Complete 10 habits total. You\'re building momentum!',
-        'day_3': 'Be active for 3 different days (doesn\'t need to be consecutive). Consistency is forming!',
-        'habits_25': 'Reach 25 total completed habits. You\'re getting serious about your goals!',
-        'week_1': 'Track habits on 7 different days. You\'ve been active for a full week!',
-        'habits_50': 'Hit 50 total habit completions. Halfway to 100!',
-        'perfect_days_5': 'Achieve 5 days where you complete all 6 habits. Excellence is becoming a habit!',
-        'day_14': 'Be active for 14 different days. Two weeks of staying engaged!',
-        'habits_75': 'Complete 75 habits in total. You\'re a habit-building machine!',
-        'perfect_days_10': 'Reach 10 perfect days (all 6 habits completed). Consistency meets excellence!',
-        'habits_100': 'Complete 100 habits! A major milestone showing dedication.',
-        'day_21': 'Be active for all 21 days of the challenge. You made it through the entire journey!',
-        'perfect_days_15': '15 perfect days achieved. You\'re mastering your routine!',
-        'habits_126': 'Complete all 126 possible habits (6 habits × 21 days). Absolute perfection!',
-        'perfect_days_21': 'All 21 days perfect! Every single habit done every single day. Ultimate achievement!',
-        
-        # Streaks
-        'streak_2': 'Complete at least one habit for 2 days in a row (streak of consecutive days).',
-        'streak_3': 'Build a 3-day streak - 3 consecutive days with at least one completed habit.',
-        'streak_5': 'Maintain a 5-day streak. Consistency is building!',
-        'streak_7': 'A full week of consecutive days! 7 days in a row with completed habits.',
-        'streak_10': '10 days in a row! Your longest ever streak hits double digits.',
-        'streak_14': '14 consecutive days - two full weeks! Your commitment is showing.',
-        'streak_21': '21 days in a row - the full challenge as a perfect streak!',
-        'current_streak_3': 'Your current active streak is 3 days. Keep it going!',
-        'current_streak_5': 'Currently on a 5-day streak. Don\'t break it now!',
-        'current_streak_7': 'A week-long active streak! You\'re on fire right now.',
-        'current_streak_10': '10 days and counting! Your current streak is impressive.',
-        'current_streak_14': 'Two weeks of current streak! Momentum is strong.',
-        'current_streak_21': '21-day active streak! You\'re currently perfect.',
-        'all_habits_streak_3': 'Every single one of your habits has at least a 3-day streak. All cylinders firing!',
-        'all_habits_streak_7': 'All 6 habits with 7+ day streaks each. Complete synchronization!',
-        
-        # Excellence
-        'completion_50': 'Your overall success rate reaches 50% - half of all possible habits completed since you started.',
-        'completion_75': '75% overall success rate. You\'re hitting three-quarters of your daily goals!',
-        'completion_90': '90% success rate! Nearly perfect across all your tracked days.',
-        'completion_100': '100% success rate - every single habit you could have done, you did!',
-        'best_habit_100': 'One of your habits has 100% success rate - you\'ve never missed it since tracking started!',
-        'all_habits_50': 'Every single habit is above 50% success rate. No weak spots in your routine!',
-        'all_habits_75': 'All habits above 75% - your entire routine is strong!',
-        'almost_perfect_5': '5 days where you completed 5 out of 6 habits. So close to perfect!',
-        'almost_perfect_10': '10 almost-perfect days (5/6 habits). Consistent excellence!',
-        'high_performer': '15 total days of either perfect (6/6) or almost perfect (5/6). You\'re crushing it!',
-        
-        # Recovery
-        'comeback_kid': 'You came back after missing a day. Setbacks don\'t stop you!',
-        'persistent': 'Active for 7+ days but with breaks in between. You keep coming back!',
-        'resilient': 'Reached 14 active days despite not having a 14-day streak. You recover from setbacks!',
-        'phoenix': 'Built a 5-day streak after breaking a previous streak. Rising from the ashes!',
-        'determined': 'Hit 50% success rate even without many perfect days. Steady wins the race!',
-        'grinder': '21 active days but fewer than 10 were perfect. You grind through the tough days!',
-        'never_quit': '21 days active but not all consecutive. You never gave up despite interruptions!',
-    }
-    
-    tooltip = tooltips.get(achievement_key, desc)
+    tooltip = ACHIEVEMENT_TOOLTIPS.get(achievement_key, desc)
     
     # Add progress info if provided
     if progress and progress['target'] > 1:
@@ -382,7 +499,9 @@ def get_achievement_tooltip(achievement_key, definition, progress=None):
 
 # ==================== Achievement System ====================
 
-# Define all 50 achievements with categories, emojis, and unlock criteria
+# Define all 50 achievements with categories, emojis, and unlock criteria.
+# Most unlock when one stat reaches a threshold ('stat'/'threshold'); the few
+# composite ones keep a 'check' callable.
 ACHIEVEMENT_DEFINITIONS = {
     # ===== MILESTONES (18 achievements) =====
     'first_habit': {
@@ -390,126 +509,144 @@ ACHIEVEMENT_DEFINITIONS = {
         'name': 'First Steps',
         'description': 'Complete your first habit',
         'emoji': '🎯',
-        'check': lambda stats: stats['total_completed'] >= 1
+        'stat': 'total_completed',
+        'threshold': 1
     },
     'day_1': {
         'category': 'Milestones',
         'name': 'Day 1 Complete',
         'description': 'Finish your first day',
         'emoji': '🌱',
-        'check': lambda stats: stats['days_active'] >= 1
+        'stat': 'days_active',
+        'threshold': 1
     },
     'perfect_day_1': {
         'category': 'Milestones',
         'name': 'First Perfect Day',
         'description': 'Complete all 6 habits in one day',
         'emoji': '⭐',
-        'check': lambda stats: stats['perfect_days'] >= 1
+        'stat': 'perfect_days',
+        'threshold': 1
     },
     'habits_5': {
         'category': 'Milestones',
         'name': '5 Habits',
         'description': 'Complete 5 total habits',
         'emoji': '🔥',
-        'check': lambda stats: stats['total_completed'] >= 5
+        'stat': 'total_completed',
+        'threshold': 5
     },
     'habits_10': {
         'category': 'Milestones',
         'name': '10 Habits',
         'description': 'Complete 10 total habits',
         'emoji': '💪',
-        'check': lambda stats: stats['total_completed'] >= 10
+        'stat': 'total_completed',
+        'threshold': 10
     },
     'day_3': {
         'category': 'Milestones',
         'name': '3-Day Warrior',
         'description': 'Stay active for 3 days',
         'emoji': '🏃',
-        'check': lambda stats: stats['days_active'] >= 3
+        'stat': 'days_active',
+        'threshold': 3
     },
     'habits_25': {
         'category': 'Milestones',
         'name': 'Quarter Century',
         'description': 'Complete 25 total habits',
         'emoji': '🎖️',
-        'check': lambda stats: stats['total_completed'] >= 25
+        'stat': 'total_completed',
+        'threshold': 25
     },
     'week_1': {
         'category': 'Milestones',
         'name': 'One Week Strong',
         'description': 'Stay active for 7 days',
         'emoji': '📅',
-        'check': lambda stats: stats['days_active'] >= 7
+        'stat': 'days_active',
+        'threshold': 7
     },
     'habits_50': {
         'category': 'Milestones',
         'name': 'Half Hundred',
         'description': 'Complete 50 total habits',
         'emoji': '🏆',
-        'check': lambda stats: stats['total_completed'] >= 50
+        'stat': 'total_completed',
+        'threshold': 50
     },
     'perfect_days_5': {
         'category': 'Milestones',
         'name': '5 Perfect Days',
         'description': 'Achieve 5 perfect days',
         'emoji': '🌟',
-        'check': lambda stats: stats['perfect_days'] >= 5
+        'stat': 'perfect_days',
+        'threshold': 5
     },
     'day_14': {
         'category': 'Milestones',
         'name': 'Two Week Titan',
         'description': 'Stay active for 14 days',
         'emoji': '🦸',
-        'check': lambda stats: stats['days_active'] >= 14
+        'stat': 'days_active',
+        'threshold': 14
     },
     'habits_75': {
         'category': 'Milestones',
         'name': '75 Habits',
         'description': 'Complete 75 total habits',
         'emoji': '💎',
-        'check': lambda stats: stats['total_completed'] >= 75
+        'stat': 'total_completed',
+        'threshold': 75
     },
     'perfect_days_10': {
         'category': 'Milestones',
         'name': '10 Perfect Days',
         'description': 'Achieve 10 perfect days',
         'emoji': '✨',
-        'check': lambda stats: stats['perfect_days'] >= 10
+        'stat': 'perfect_days',
+        'threshold': 10
     },
     'habits_100': {
         'category': 'Milestones',
         'name': 'Centurion',
         'description': 'Complete 100 total habits',
         'emoji': '👑',
-        'check': lambda stats: stats['total_completed'] >= 100
+        'stat': 'total_completed',
+        'threshold': 100
     },
     'day_21': {
         'category': 'Milestones',
         'name': '21-Day Champion',
         'description': 'Complete the full 21-day challenge',
         'emoji': '🎉',
-        'check': lambda stats: stats['days_active'] >= 21
+        'stat': 'days_active',
+        'threshold': 21
     },
     'perfect_days_15': {
         'category': 'Milestones',
         'name': '15 Perfect Days',
         'description': 'Achieve 15 perfect days',
         'emoji': '🌈',
-        'check': lambda stats: stats['perfect_days'] >= 15
+        'stat': 'perfect_days',
+        'threshold': 15
     },
     'habits_126': {
         'category': 'Milestones',
         'name': 'Perfect Challenge',
         'description': 'Complete all 126 possible habits (6 × 21)',
         'emoji': '🏅',
-        'check': lambda stats: stats['total_completed'] >= 126
+        'stat': 'total_completed',
+        'threshold': 126
     },
     'perfect_days_21': {
         'category': 'Milestones',
         'name': 'Perfection Personified',
         'description': 'Achieve 21 perfect days',
         'emoji': '🔱',
-        'check': lambda stats: stats['perfect_days'] >= 21
+        'stat': 'perfect_days',
+        'threshold': 21
     },
     
     # ===== STREAKS (15 achievements) =====
@@ -518,105 +655,120 @@ ACHIEVEMENT_DEFINITIONS = {
         'name': 'Streak Starter',
         'description': 'Maintain a 2-day streak',
         'emoji': '🔗',
-        'check': lambda stats: stats['max_streak'] >= 2
+        'stat': 'max_streak',
+        'threshold': 2
     },
     'streak_3': {
         'category': 'Streaks',
         'name': '3-Day Streak',
         'description': 'Maintain a 3-day streak',
         'emoji': '⚡',
-        'check': lambda stats: stats['max_streak'] >= 3
+        'stat': 'max_streak',
+        'threshold': 3
     },
     'streak_5': {
         'category': 'Streaks',
         'name': '5-Day Streak',
         'description': 'Maintain a 5-day streak',
         'emoji': '🔥',
-        'check': lambda stats: stats['max_streak'] >= 5
+        'stat': 'max_streak',
+        'threshold': 5
     },
     'streak_7': {
         'category': 'Streaks',
         'name': 'Week Warrior',
         'description': 'Maintain a 7-day streak',
         'emoji': '⚔️',
-        'check': lambda stats: stats['max_streak'] >= 7
+        'stat': 'max_streak',
+        'threshold': 7
     },
     'streak_10': {
         'category': 'Streaks',
         'name': '10-Day Streak',
         'description': 'Maintain a 10-day streak',
         'emoji': '💫',
-        'check': lambda stats: stats['max_streak'] >= 10
+        'stat': 'max_streak',
+        'threshold': 10
     },
     'streak_14': {
         'category': 'Streaks',
         'name': 'Fortnight Force',
         'description': 'Maintain a 14-day streak',
         'emoji': '🌠',
-        'check': lambda stats: stats['max_streak'] >= 14
+        'stat': 'max_streak',
+        'threshold': 14
     },
     'streak_21': {
         'category': 'Streaks',
         'name': 'Unstoppable',
         'description': 'Maintain a 21-day streak',
         'emoji': '🚀',
-        'check': lambda stats: stats['max_streak'] >= 21
+        'stat': 'max_streak',
+        'threshold': 21
     },
     'current_streak_3': {
         'category': 'Streaks',
         'name': 'On Fire',
         'description': 'Current streak of 3 days',
         'emoji': '🌶️',
-        'check': lambda stats: stats['current_streak'] >= 3
+        'stat': 'current_streak',
+        'threshold': 3
     },
     'current_streak_5': {
         'category': 'Streaks',
         'name': 'Blazing Trail',
         'description': 'Current streak of 5 days',
         'emoji': '🔥',
-        'check': lambda stats: stats['current_streak'] >= 5
+        'stat': 'current_streak',
+        'threshold': 5
     },
     'current_streak_7': {
         'category': 'Streaks',
         'name': 'Hot Streak',
         'description': 'Current streak of 7 days',
         'emoji': '🌋',
-        'check': lambda stats: stats['current_streak'] >= 7
+        'stat': 'current_streak',
+        'threshold': 7
     },
     'current_streak_10': {
         'category': 'Streaks',
         'name': 'Inferno',
         'description': 'Current streak of 10 days',
         'emoji': '🔆',
-        'check': lambda stats: stats['current_streak'] >= 10
+        'stat': 'current_streak',
+        'threshold': 10
     },
     'current_streak_14': {
         'category': 'Streaks',
         'name': 'Burning Bright',
         'description': 'Current streak of 14 days',
         'emoji': '☀️',
-        'check': lambda stats: stats['current_streak'] >= 14
+        'stat': 'current_streak',
+        'threshold': 14
     },
     'current_streak_21': {
         'category': 'Streaks',
         'name': 'Eternal Flame',
         'description': 'Current streak of 21 days',
         'emoji': '🌞',
-        'check': lambda stats: stats['current_streak'] >= 21
+        'stat': 'current_streak',
+        'threshold': 21
     },
     'all_habits_streak_3': {
         'category': 'Streaks',
         'name': 'Triple Threat',
         'description': 'All habits with 3-day streaks',
         'emoji': '🎯',
-        'check': lambda stats: stats['min_habit_streak'] >= 3
+        'stat': 'min_habit_streak',
+        'threshold': 3
     },
     'all_habits_streak_7': {
         'category': 'Streaks',
         'name': 'Synchronized Success',
         'description': 'All habits with 7-day streaks',
         'emoji': '🎼',
-        'check': lambda stats: stats['min_habit_streak'] >= 7
+        'stat': 'min_habit_streak',
+        'threshold': 7
     },
     
     # ===== EXCELLENCE (10 achievements) =====
@@ -625,63 +777,72 @@ ACHIEVEMENT_DEFINITIONS = {
         'name': 'Halfway There',
         'description': 'Reach 50% overall success rate',
         'emoji': '🎯',
-        'check': lambda stats: stats['overall_completion'] >= 50.0
+        'stat': 'overall_completion',
+        'threshold': 50.0
     },
     'completion_75': {
         'category': 'Excellence',
         'name': 'Excellence',
         'description': 'Reach 75% overall success rate',
         'emoji': '🌟',
-        'check': lambda stats: stats['overall_completion'] >= 75.0
+        'stat': 'overall_completion',
+        'threshold': 75.0
     },
     'completion_90': {
         'category': 'Excellence',
         'name': 'Near Perfect',
         'description': 'Reach 90% overall success rate',
         'emoji': '💯',
-        'check': lambda stats: stats['overall_completion'] >= 90.0
+        'stat': 'overall_completion',
+        'threshold': 90.0
     },
     'completion_100': {
         'category': 'Excellence',
         'name': 'Perfection',
         'description': 'Reach 100% overall success rate',
         'emoji': '👑',
-        'check': lambda stats: stats['overall_completion'] >= 100.0
+        'stat': 'overall_completion',
+        'threshold': 100.0
     },
     'best_habit_100': {
         'category': 'Excellence',
         'name': 'Master of One',
         'description': 'One habit at 100% success rate',
         'emoji': '🏆',
-        'check': lambda stats: stats['best_habit_completion'] >= 100.0
+        'stat': 'best_habit_completion',
+        'threshold': 100.0
     },
     'all_habits_50': {
         'category': 'Excellence',
         'name': 'Balanced Effort',
         'description': 'All habits above 50%',
         'emoji': '⚖️',
-        'check': lambda stats: stats['worst_habit_completion'] >= 50.0
+        'stat': 'worst_habit_completion',
+        'threshold': 50.0
     },
     'all_habits_75': {
         'category': 'Excellence',
         'name': 'Well Rounded',
         'description': 'All habits above 75%',
         'emoji': '🎯',
-        'check': lambda stats: stats['worst_habit_completion'] >= 75.0
+        'stat': 'worst_habit_completion',
+        'threshold': 75.0
     },
     'almost_perfect_5': {
         'category': 'Excellence',
         'name': 'Close Calls',
         'description': '5 almost perfect days (5/6 habits)',
         'emoji': '🎲',
-        'check': lambda stats: stats['almost_perfect_days'] >= 5
+        'stat': 'almost_perfect_days',
+        'threshold': 5
     },
     'almost_perfect_10': {
         'category': 'Excellence',
         'name': 'Consistently Great',
         'description': '10 almost perfect days',
         'emoji': '🎪',
-        'check': lambda stats: stats['almost_perfect_days'] >= 10
+        'stat': 'almost_perfect_days',
+        'threshold': 10
     },
     'high_performer': {
         'category': 'Excellence',
@@ -743,18 +904,59 @@ ACHIEVEMENT_DEFINITIONS = {
     }
 }
 
+def threshold_check(stat, threshold):
+    """Build the check callable for a "stat >= threshold" achievement."""
+    return lambda stats: stats[stat] >= threshold
+
+# (key, stat, threshold) rows and (key, check) pairs, evaluated by evaluate_achievements.
+# Threshold achievements also get a 'check' so every definition can be tested on its own.
+THRESHOLD_ACHIEVEMENTS = []
+COMPOSITE_ACHIEVEMENTS = []
+for _key, _definition in ACHIEVEMENT_DEFINITIONS.items():
+    if 'check' in _definition:
+        COMPOSITE_ACHIEVEMENTS.append((_key, _definition['check']))
+    else:
+        THRESHOLD_ACHIEVEMENTS.append((_key, _definition['stat'], _definition['threshold']))
+        _definition['check'] = threshold_check(_definition['stat'], _definition['threshold'])
+
+# Definitions in order, overall and per category, so callers don't re-walk and filter the dict
+DEFINITIONS_ITEMS = tuple(ACHIEVEMENT_DEFINITIONS.items())
+DEFINITIONS_BY_CATEGORY = {}
+for _key, _definition in DEFINITIONS_ITEMS:
+    DEFINITIONS_BY_CATEGORY.setdefault(_definition['category'], []).append((_key, _definition))
+
+def evaluate_achievements(stats):
+    """Get the set of achievement keys whose unlock criteria stats meets."""
+    satisfied = {key for key, stat, threshold in THRESHOLD_ACHIEVEMENTS if stats[stat] >= threshold}
+    for key, check in COMPOSITE_ACHIEVEMENTS:
+        if check(stats):
+            satisfied.add(key)
+    return satisfied
+
 
 def get_achievement_stats(user_id):
-    """Calculate all stats needed for achievement checking."""
-    from app.models import Habit, HabitEntry, Achievement
+    """Get the stats needed for achievement checking, memoized for the current request.
     
-    habits = Habit.query.filter_by(user_id=user_id).all()
+    The stats page asks for them once per achievement category; refresh_user_stats
+    and invalidate_user_habits drop the cached copy (via invalidate_user_stats) after a write.
+    """
+    cache = g.setdefault('achievement_stats', {})
+    if user_id not in cache:
+        cache[user_id] = calculate_achievement_stats(user_id)
+    return cache[user_id]
+
+
+def calculate_achievement_stats(user_id):
+    """Calculate all stats needed for achievement checking."""
+    habits = get_user_habits(user_id)
     
     if not habits:
         return None
     
-    # Get overall stats
-    overall_stats = get_overall_stats(habits, user_id)
+    # Get overall stats (shared with the stats page within a request)
+    aggregates = get_habit_aggregates(user_id)
+    today = datetime.now().date()
+    overall_stats = get_user_overall_stats(user_id)
     
     # Calculate max streak across all habits
     max_streak = 0
@@ -763,13 +965,19 @@ def get_achievement_stats(user_id):
     best_habit_completion = 0.0
     worst_habit_completion = 100.0
     
-    for habit in habits:
-        habit_stats = get_habit_stats(habit)
+    for item in overall_stats['habit_stats']:
+        habit, habit_stats = item['habit'], item['stats']
         max_streak = max(max_streak, habit_stats['longest_streak'])
         current_streak = max(current_streak, habit_stats['current_streak'])
         min_habit_streak = min(min_habit_streak, habit_stats['current_streak'])
-        best_habit_completion = max(best_habit_completion, habit_stats['challenge_percent'])
-        worst_habit_completion = min(worst_habit_completion, habit_stats['challenge_percent'])
+        
+        # Per-habit completion counts from the habit's own start, not the global one
+        total, completed, earliest = aggregates.get(habit.id, (0, 0, None))
+        challenge_percent = calculate_completion_rate_from_counts(
+            completed, total, habit.created_at.date(), earliest, today=today
+        )['challenge_percent']
+        best_habit_completion = max(best_habit_completion, challenge_percent)
+        worst_habit_completion = min(worst_habit_completion, challenge_percent)
     
     if min_habit_streak == float('inf'):
         min_habit_streak = 0
@@ -788,235 +996,217 @@ def get_achievement_stats(user_id):
     }
 
 
-def get_achievement_unlock_date(user_id, achievement_key):
-    """Determine the actual date when an achievement was earned based on habit entries."""
-    from app.models import Habit, HabitEntry
-    from datetime import datetime
-    
-    # Get all habits and entries for the user
-    habits = Habit.query.filter_by(user_id=user_id).all()
-    if not habits:
-        return datetime.now()
+def get_achievement_unlock_dates(user_id, achievement_keys, habits=None):
+    """Get {key: unlock datetime} for several achievements from one sweep over the entries.
     
-    # Get all entries sorted by date
-    all_entries = []
-    for habit in habits:
-        all_entries.extend(habit.entries)
-    
-    if not all_entries:
-        return datetime.now()
-    
-    all_entries.sort(key=lambda x: x.date)
-    
-    # For different achievement types, determine the unlock date differently
-    definition = ACHIEVEMENT_DEFINITIONS.get(achievement_key)
-    if not definition:
-        return datetime.now()
-    
-    # Check achievements day by day to find when it was first unlocked
-    unique_dates = sorted(set(entry.date for entry in all_entries))
-    
-    for date in unique_dates:
-        # Calculate stats up to this date
-        stats = get_achievement_stats_up_to_date(user_id, date)
-        if stats and definition['check'](stats):
+    Pass habits when the caller already has the user's habit list loaded.
+    """
+    # Threshold achievements unlock the first day their stat reaches the threshold,
+    # so keep each stat's pending thresholds sorted (lowest last) and pop them as
+    # the stat crosses; only composite achievements need their check run
+    pending_thresholds = defaultdict(list)
+    pending_checks = {}
+    for key in set(achievement_keys):
+        definition = ACHIEVEMENT_DEFINITIONS.get(key)
+        if definition is None:
+            continue
+        if 'stat' in definition:
+            pending_thresholds[definition['stat']].append((definition['threshold'], key))
+        else:
+            pending_checks[key] = definition['check']
+    for thresholds in pending_thresholds.values():
+        thresholds.sort(reverse=True)
+    unlock_dates = {}
+    
+    # Check achievements day by day to find when each was first unlocked
+    if pending_thresholds or pending_checks:
+        for date, stats in iter_stats_by_date(user_id, habits):
             # Convert date to datetime (end of day)
-            return datetime.combine(date, datetime.max.time())
+            unlocked_at = datetime.combine(date, datetime.max.time())
+            
+            for stat in list(pending_thresholds):
+                thresholds = pending_thresholds[stat]
+                value = stats[stat]
+                while thresholds and thresholds[-1][0] <= value:
+                    unlock_dates[thresholds.pop()[1]] = unlocked_at
+                if not thresholds:
+                    del pending_thresholds[stat]
+            
+            for key in [key for key, check in pending_checks.items() if check(stats)]:
+                unlock_dates[key] = unlocked_at
+                del pending_checks[key]
+            
+            if not pending_thresholds and not pending_checks:
+                break
     
     # If we can't determine, use current time
-    return datetime.now()
+    now = datetime.now()
+    for key in achievement_keys:
+        unlock_dates.setdefault(key, now)
+    return unlock_dates
 
 
-def get_achievement_stats_up_to_date(user_id, end_date):
-    """Calculate achievement stats up to a specific date (inclusive)."""
-    from app.models import Habit, HabitEntry
+def iter_stats_by_date(user_id, habits=None):
+    """Yield (date, stats) for each date the user has entries, in date order.
     
-    habits = Habit.query.filter_by(user_id=user_id).all()
+    Each stats dict has the get_achievement_stats keys, counted over the entries
+    up to and including that date, from running totals kept over a single pass.
+    """
+    if habits is None:
+        habits = get_user_habits(user_id)
     if not habits:
-        return None
-    
-    # Filter entries up to end_date
-    filtered_habits = []
-    for habit in habits:
-        filtered_entries = [e for e in habit.entries if e.date <= end_date]
-        if filtered_entries:
-            # Create a temporary habit object with filtered entries
-            class TempHabit:
-                def __init__(self, habit, entries):
-                    self.id = habit.id
-                    self.user_id = habit.user_id
-                    self.name = habit.name
-                    self.order = habit.order
-                    self.created_at = habit.created_at
-                    self.entries = entries
-            
-            filtered_habits.append(TempHabit(habit, filtered_entries))
-    
-    if not filtered_habits:
-        return None
-    
-    # Calculate stats for this date range
-    # Get overall stats
-    total_completed = sum(len([e for e in h.entries if e.completed]) for h in filtered_habits)
-    
-    # Get perfect and almost perfect days up to this date
-    dates_dict = defaultdict(lambda: {'completed': 0, 'total': 0})
-    for habit in filtered_habits:
-        for entry in habit.entries:
-            dates_dict[entry.date]['total'] += 1
-            if entry.completed:
-                dates_dict[entry.date]['completed'] += 1
-    
-    perfect_days = sum(1 for d in dates_dict.values() if d['completed'] == 6 and d['total'] == 6)
-    almost_perfect_days = sum(1 for d in dates_dict.values() if d['completed'] == 5 and d['total'] >= 5)
-    days_active = len(dates_dict)
-    
-    # Calculate total possible entries up to this date
-    if filtered_habits:
-        earliest_start = min(h.created_at.date() for h in filtered_habits)
-        days_since_start = (end_date - earliest_start).days + 1
-        total_possible = len(filtered_habits) * days_since_start
-        overall_completion = round((total_completed / total_possible) * 100, 1) if total_possible > 0 else 0.0
-    else:
-        overall_completion = 0.0
+        return
     
-    # Calculate streaks
-    max_streak = 0
-    current_streak = 0
-    min_habit_streak = float('inf')
-    best_habit_completion = 0.0
-    worst_habit_completion = 100.0
+    created = {habit.id: habit.created_at.date() for habit in habits}
+    rows = db.session.query(
+        HabitEntry.habit_id, HabitEntry.date, HabitEntry.completed
+    ).filter(
+        HabitEntry.habit_id.in_(list(created))
+    ).order_by(HabitEntry.date).all()
     
-    for habit in filtered_habits:
-        habit_stats = calculate_habit_stats_for_entries(habit.entries, end_date)
-        max_streak = max(max_streak, habit_stats['longest_streak'])
-        current_streak = max(current_streak, habit_stats['current_streak'])
-        min_habit_streak = min(min_habit_streak, habit_stats['current_streak'])
-        best_habit_completion = max(best_habit_completion, habit_stats['success_rate'])
-        worst_habit_completion = min(worst_habit_completion, habit_stats['success_rate'])
-    
-    if min_habit_streak == float('inf'):
-        min_habit_streak = 0
+    # Per-habit running state: [entries, completed, longest streak, run, last entry day]
+    habit_state = {}
+    total_completed = 0
+    perfect_days = 0
+    almost_perfect_days = 0
+    earliest_start = None
+    days_active = 0
     
-    return {
-        'total_completed': total_completed,
-        'days_active': days_active,
-        'perfect_days': perfect_days,
-        'almost_perfect_days': almost_perfect_days,
-        'max_streak': max_streak,
-        'current_streak': current_streak,
-        'min_habit_streak': min_habit_streak,
-        'overall_completion': overall_completion,
-        'best_habit_completion': best_habit_completion,
-        'worst_habit_completion': worst_habit_completion
-    }
-
-
-def calculate_habit_stats_for_entries(entries, end_date):
-    """Calculate habit stats for a set of entries up to a specific date."""
-    if not entries:
-        return {
-            'longest_streak': 0,
-            'current_streak': 0,
-            'success_rate': 0.0
+    for date, day_rows in groupby(rows, key=attrgetter('date')):
+        day = date.toordinal()
+        
+        # Current streaks count back from the day before, so read them before
+        # this date's entries are applied
+        current_streaks = {
+            habit_id: state[3] if state[4] == day - 1 else 0
+            for habit_id, state in habit_state.items()
         }
-    
-    # Sort entries
-    sorted_entries = sorted(entries, key=lambda x: x.date)
-    
-    # Calculate longest streak
-    max_streak = 0
-    temp_streak = 0
-    prev_date = None
-    
-    for entry in sorted_entries:
-        if entry.completed:
-            if prev_date is None or (entry.date - prev_date).days == 1:
-                temp_streak += 1
+        
+        day_total = 0
+        day_completed = 0
+        for habit_id, _, completed in day_rows:
+            state = habit_state.get(habit_id)
+            if state is None:
+                state = habit_state[habit_id] = [0, 0, 0, 0, None]
+                current_streaks[habit_id] = 0
+                if earliest_start is None or created[habit_id] < earliest_start:
+                    earliest_start = created[habit_id]
+            
+            state[0] += 1
+            day_total += 1
+            if completed:
+                state[1] += 1
+                day_completed += 1
+                state[3] = state[3] + 1 if state[4] is not None and day - state[4] == 1 else 1
+                if state[3] > state[2]:
+                    state[2] = state[3]
             else:
-                temp_streak = 1
-            max_streak = max(max_streak, temp_streak)
-            prev_date = entry.date
-        else:
-            temp_streak = 0
-            prev_date = entry.date
-    
-    # Calculate current streak (counting backwards from day before end_date)
-    # Today should never affect the streak - always start from yesterday
-    current_streak = 0
-    expected_date = end_date - timedelta(days=1)
-    sorted_entries_desc = sorted(entries, key=lambda x: x.date, reverse=True)
-    
-    for entry in sorted_entries_desc:
-        if entry.date == expected_date and entry.completed:
-            current_streak += 1
-            expected_date = expected_date - timedelta(days=1)
-        elif entry.date < expected_date:
-            break
-    
-    # Calculate success rate
-    completed = sum(1 for e in entries if e.completed)
-    success_rate = round((completed / len(entries)) * 100, 1) if entries else 0.0
-    
-    return {
-        'longest_streak': max_streak,
-        'current_streak': current_streak,
-        'success_rate': success_rate
-    }
+                state[3] = 0
+            state[4] = day
+        
+        total_completed += day_completed
+        days_active += 1
+        if day_completed == 6 and day_total == 6:
+            perfect_days += 1
+        if day_completed == 5 and day_total >= 5:
+            almost_perfect_days += 1
+        
+        total_possible = len(habit_state) * ((date - earliest_start).days + 1)
+        overall_completion = round((total_completed / total_possible) * 100, 1) if total_possible > 0 else 0.0
+        
+        success_rates = [round((state[1] / state[0]) * 100, 1) for state in habit_state.values()]
+        
+        yield date, {
+            'total_completed': total_completed,
+            'days_active': days_active,
+            'perfect_days': perfect_days,
+            'almost_perfect_days': almost_perfect_days,
+            'max_streak': max(state[2] for state in habit_state.values()),
+            'current_streak': max(current_streaks.values()),
+            'min_habit_streak': min(current_streaks.values()),
+            'overall_completion': overall_completion,
+            'best_habit_completion': max([0.0] + success_rates),
+            'worst_habit_completion': min([100.0] + success_rates)
+        }
 
 
-def check_achievements(user_id):
-    """Check and unlock new achievements for a user. Returns list of newly unlocked achievement keys."""
-    from app.models import Achievement
+def check_achievements(user_id, commit=True):
+    """Check and unlock new achievements for a user. Returns list of newly unlocked achievement keys.
     
+    Pass commit=False to leave the new rows pending so the caller can commit
+    several checks in one transaction.
+    """
     stats = get_achievement_stats(user_id)
     if not stats:
         return []
     
     # Get already unlocked achievements
-    unlocked_keys = set(
-        a.achievement_key for a in Achievement.query.filter_by(user_id=user_id).all()
-    )
+    unlocked_keys = get_unlocked_keys(user_id)
+    
+    # Check all achievements in one pass, then unlock the new ones in definition order
+    satisfied = evaluate_achievements(stats) - unlocked_keys
+    if not satisfied:
+        return []
     
-    # Check all achievements
-    newly_unlocked = []
-    for key, definition in ACHIEVEMENT_DEFINITIONS.items():
-        if key not in unlocked_keys:
-            try:
-                if definition['check'](stats):
-                    # Determine the actual unlock date
-                    unlock_date = get_achievement_unlock_date(user_id, key)
-                    
-                    # Unlock achievement
-                    new_achievement = Achievement(
-                        user_id=user_id,
-                        achievement_key=key,
-                        unlocked_at=unlock_date,
-                        viewed=False
-                    )
-                    db.session.add(new_achievement)
-                    newly_unlocked.append({
-                        'key': key,
-                        'name': definition['name'],
-                        'description': definition['description'],
-                        'emoji': definition['emoji'],
-                        'category': definition['category']
-                    })
-            except Exception as e:
-                # Skip achievements that fail to check
-                print(f"Error checking achievement {key}: {e}")
-                continue
-    
-    if newly_unlocked:
+    # Determine the actual unlock dates with one sweep shared by all new achievements
+    unlock_dates = get_achievement_unlock_dates(user_id, satisfied)
+    
+    new_rows = [
+        {
+            'user_id': user_id,
+            'achievement_key': key,
+            'unlocked_at': unlock_dates[key],
+            'viewed': False
+        }
+        for key, definition in DEFINITIONS_ITEMS if key in satisfied
+    ]
+    
+    # Unlock them all with one multi-row INSERT rather than an ORM object per achievement.
+    # A concurrent request may unlock the same key; skip it rather than fail (and roll
+    # back the caller's write in the same transaction), and only report the keys this
+    # request actually inserted so the other request's toast isn't shown twice
+    dialect = db.engine.dialect
+    if dialect.name in UPSERT_INSERTS:
+        stmt = UPSERT_INSERTS[dialect.name](Achievement).on_conflict_do_nothing(
+            index_elements=['user_id', 'achievement_key']
+        ).returning(Achievement.achievement_key)
+        inserted = set(db.session.execute(stmt, new_rows).scalars())
+    else:
+        db.session.execute(Achievement.__table__.insert(), new_rows)
+        inserted = satisfied
+    unlocked_keys.update(satisfied)
+    
+    newly_unlocked = [
+        {
+            'key': key,
+            'name': definition['name'],
+            'description': definition['description'],
+            'emoji': definition['emoji'],
+            'category': definition['category']
+        }
+        for key, definition in DEFINITIONS_ITEMS if key in inserted
+    ]
+    if newly_unlocked and commit:
         db.session.commit()
     
     return newly_unlocked
 
 
+def get_unlocked_keys(user_id):
+    """Get the set of a user's unlocked achievement keys, memoized for the current request.
+    
+    check_achievements adds the keys it unlocks, so the set stays current.
+    """
+    cache = g.setdefault('unlocked_keys', {})
+    if user_id not in cache:
+        cache[user_id] = {
+            key for (key,) in db.session.query(Achievement.achievement_key).filter_by(user_id=user_id)
+        }
+    return cache[user_id]
+
+
 def get_unlocked_achievements(user_id, category=None):
     """Get all unlocked achievements for a user, optionally filtered by category."""
-    from app.models import Achievement
-    
     query = Achievement.query.filter_by(user_id=user_id)
     unlocked = query.all()
     
@@ -1043,25 +1233,20 @@ def get_unlocked_achievements(user_id, category=None):
 
 def get_locked_with_progress(user_id, category=None):
     """Get locked achievements with progress information."""
-    from app.models import Achievement
-    
     stats = get_achievement_stats(user_id)
     if not stats:
         return []
     
     # Get already unlocked achievement keys
-    unlocked_keys = set(
-        a.achievement_key for a in Achievement.query.filter_by(user_id=user_id).all()
-    )
+    unlocked_keys = get_unlocked_keys(user_id)
+    
+    definitions = DEFINITIONS_BY_CATEGORY.get(category, ()) if category else DEFINITIONS_ITEMS
     
     result = []
-    for key, definition in ACHIEVEMENT_DEFINITIONS.items():
+    for key, definition in definitions:
         if key in unlocked_keys:
             continue
         
-        if category and definition['category'] != category:
-            continue
-        
         # Calculate progress for this achievement
         progress = calculate_achievement_progress(key, definition, stats)
         
@@ -1081,101 +1266,91 @@ def get_locked_with_progress(user_id, category=None):
     return result
 
 
-def calculate_achievement_progress(key, definition, stats):
-    """Calculate progress toward an achievement."""
-    # Extract the target value from achievement key or description
-    # This is a simplified version - you could make this more sophisticated
-    
+def parse_progress_key(key):
+    """Get (stat, target, round_current) for achievements whose target is in the key, else None."""
     # Check for specific patterns first (most specific to least specific)
+    parts = key.split('_')
     if key.startswith('all_habits_streak_'):
-        target = int(key.split('_')[3])
-        current = stats.get('all_habits_streak', 0)
-        return {
-            'current': current,
-            'target': target,
-            'percent': min(100, round((current / target) * 100, 1))
-        }
+        return 'all_habits_streak', int(parts[3]), False
     elif key.startswith('all_habits_'):
-        target = int(key.split('_')[2])
-        current = stats.get('overall_completion', 0)
-        return {
-            'current': round(current, 1),
-            'target': target,
-            'percent': min(100, round((current / target) * 100, 1))
-        }
-    elif key.startswith('habits_') and key.split('_')[1].isdigit():
-        target = int(key.split('_')[1])
-        current = stats['total_completed']
-        return {
-            'current': current,
-            'target': target,
-            'percent': min(100, round((current / target) * 100, 1))
-        }
+        return 'overall_completion', int(parts[2]), True
+    elif key.startswith('habits_') and parts[1].isdigit():
+        return 'total_completed', int(parts[1]), False
     elif 'current_streak_' in key:
-        target = int(key.split('_')[2])
-        current = stats['current_streak']
-        return {
-            'current': current,
-            'target': target,
-            'percent': min(100, round((current / target) * 100, 1))
-        }
+        return 'current_streak', int(parts[2]), False
     elif 'perfect_days_' in key:
-        target = int(key.split('_')[2])
-        current = stats['perfect_days']
-        return {
-            'current': current,
-            'target': target,
-            'percent': min(100, round((current / target) * 100, 1))
-        }
+        return 'perfect_days', int(parts[2]), False
     elif 'almost_perfect_' in key:
-        target = int(key.split('_')[2])
-        current = stats['almost_perfect_days']
-        return {
-            'current': current,
-            'target': target,
-            'percent': min(100, round((current / target) * 100, 1))
-        }
+        return 'almost_perfect_days', int(parts[2]), False
     elif 'streak_' in key and 'current' not in key and 'all' not in key:
-        target = int(key.split('_')[1])
-        current = stats['max_streak']
+        return 'max_streak', int(parts[1]), False
+    elif key.startswith('day_') and parts[1].isdigit():
+        return 'days_active', int(parts[1]), False
+    elif 'completion_' in key:
+        return 'overall_completion', float(parts[1]), True
+    return None
+
+# Keys are static, so parse them once at import instead of on every progress lookup
+PROGRESS_TABLE = {}
+for _key in ACHIEVEMENT_DEFINITIONS:
+    try:
+        _entry = parse_progress_key(_key)
+    except ValueError:
+        _entry = None
+    if _entry:
+        PROGRESS_TABLE[_key] = _entry
+
+def calculate_achievement_progress(key, definition, stats):
+    """Calculate progress toward an achievement."""
+    entry = PROGRESS_TABLE.get(key)
+    if entry:
+        stat, target, round_current = entry
+        current = stats.get(stat, 0)
         return {
-            'current': current,
+            'current': round(current, 1) if round_current else current,
             'target': target,
             'percent': min(100, round((current / target) * 100, 1))
         }
-    elif key.startswith('day_') and key.split('_')[1].isdigit():
-        target = int(key.split('_')[1])
-        current = stats['days_active']
+    
+    # For complex achievements, just return 0 or 100
+    try:
+        is_unlocked = definition['check'](stats)
         return {
-            'current': current,
-            'target': target,
-            'percent': min(100, round((current / target) * 100, 1))
+            'current': 1 if is_unlocked else 0,
+            'target': 1,
+            'percent': 100 if is_unlocked else 0
         }
-    elif 'completion_' in key:
-        target = float(key.split('_')[1])
-        current = stats['overall_completion']
+    except:
         return {
-            'current': round(current, 1),
-            'target': target,
-            'percent': min(100, round((current / target) * 100, 1))
+            'current': 0,
+            'target': 1,
+            'percent': 0
         }
-    else:
-        # For complex achievements, just return 0 or 100
-        try:
-            is_unlocked = definition['check'](stats)
-            return {
-                'current': 1 if is_unlocked else 0,
-                'target': 1,
-                'percent': 100 if is_unlocked else 0
-            }
-        except:
-            return {
-                'current': 0,
-                'target': 1,
-                'percent': 0
-            }
 
 
-def run_retroactive_achievements(user_id):
-    """Run achievement check for existing user data (used in migration)."""
-    return check_achievements(user_id)
+def prime_user_habits(user_ids):
+    """Load habits for many users in one query and fill the habit cache."""
+    habits = Habit.query.filter(
+        Habit.user_id.in_(user_ids)
+    ).order_by(Habit.user_id, Habit.order, Habit.id).all()
+    
+    cache = g.setdefault('user_habits', {})
+    for user_id in user_ids:
+        cache[user_id] = []
+    for habit in habits:
+        cache[habit.user_id].append(habit)
+
+
+def run_retroactive_achievements(user_ids):
+    """Run achievement checks for existing user data (used in migration).
+    
+    Habits are loaded for all users up front (the checks themselves read entries
+    through per-user column queries), and the new achievements are committed once
+    at the end. Returns a dict of user_id -> newly unlocked achievements.
+    """
+    prime_user_habits(user_ids)
+    
+    results = {user_id: check_achievements(user_id, commit=False) for user_id in user_ids}
+    db.session.commit()
+    
+    return results
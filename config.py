@@ -7,3 +7,20 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'habits.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True}
+    # Added to the engine options for server databases only (SQLite keeps its
+    # default pool). Size the pool to the number of threads a worker serves
+    # (DB_POOL_SIZE); connections are recycled before MySQL/Postgres idle timeouts drop them
+    SERVER_POOL_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+        'max_overflow': 20,
+        'pool_recycle': 1800,
+    }
+    CACHE_TYPE = 'SimpleCache'
+    # The classic rollback journal works everywhere, including network filesystems
+    # such as PythonAnywhere's; set WAL when the database is on a local disk so
+    # reads can proceed during writes
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'DELETE'
+    # Create missing tables on startup. Convenient locally; production sets
+    # INIT_SCHEMA=0 and runs `flask --app run init-db` once per deploy instead
+    INIT_SCHEMA = os.environ.get('INIT_SCHEMA', '1').lower() not in ('0', 'false', 'no')
@@ -3,8 +3,8 @@ Migration script to fix achievement unlock dates.
 This recalculates the correct unlock dates for all existing achievements.
 """
 from app import create_app, db
-from app.models import User, Achievement
-from app.utils import get_achievement_unlock_date, ACHIEVEMENT_DEFINITIONS
+from app.models import User, Habit, Achievement
+from app.utils import get_achievement_unlock_dates, ACHIEVEMENT_DEFINITIONS
 from datetime import datetime
 
 def fix_achievement_dates():
@@ -14,22 +14,27 @@ def fix_achievement_dates():
     with app.app_context():
         print("Starting achievement date fix...")
         
-        # Get all users
-        users = User.query.all()
+        # Only ids and names are held for the whole run; each user's habits and
+        # achievements are loaded, fixed and committed on their own
+        users = User.query.with_entities(User.id, User.username).order_by(User.id).all()
         print(f"Found {len(users)} users")
         
-        for user in users:
-            print(f"\nProcessing user: {user.username} (ID: {user.id})")
+        for user_id, username in users:
+            print(f"\nProcessing user: {username} (ID: {user_id})")
             
             # Get all achievements for this user
-            achievements = Achievement.query.filter_by(user_id=user.id).all()
+            achievements = Achievement.query.filter_by(user_id=user_id).all()
             print(f"  Found {len(achievements)} achievements")
             
+            # Recalculate the correct unlock dates (one sweep for all of them)
+            habits = Habit.query.filter_by(user_id=user_id).order_by(Habit.order, Habit.id).all()
+            new_dates = get_achievement_unlock_dates(
+                user_id, [a.achievement_key for a in achievements], habits
+            )
+            
             for achievement in achievements:
                 old_date = achievement.unlocked_at
-                
-                # Recalculate the correct unlock date
-                new_date = get_achievement_unlock_date(user.id, achievement.achievement_key)
+                new_date = new_dates[achievement.achievement_key]
                 
                 # Get achievement name for display
                 definition = ACHIEVEMENT_DEFINITIONS.get(achievement.achievement_key, {})
@@ -42,9 +47,12 @@ def fix_achievement_dates():
                     achievement.unlocked_at = new_date
                 else:
                     print(f"  - {name}: {old_date.strftime('%Y-%m-%d')} (no change)")
+            
+            # Commit this user's changes and drop their rows from the session so
+            # memory stays bounded by the largest user, not the whole database
+            db.session.commit()
+            db.session.expunge_all()
         
-        # Commit all changes
-        db.session.commit()
         print("\n✓ All achievement dates have been updated!")
         print("Changes saved to database.")
 
@@ -0,0 +1,54 @@
+"""
+Migration script to add performance indexes to existing databases.
+db.create_all() only creates indexes for new tables, so older databases need this once.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from app import create_app, db
+from app.models import HabitEntry, User
+
+# Indexes older versions of this script created that no query uses any more
+OBSOLETE_INDEXES = {'habit_entry': ('ix_habit_entry_date',)}
+
+def existing_index_names(conn, table_name):
+    """Get the names of a table's indexes from the catalog.
+    
+    Reflection (inspector.get_indexes) skips expression indexes such as
+    lower(username) on SQLite, so read sqlite_master / pg_indexes directly.
+    """
+    if conn.dialect.name == 'sqlite':
+        query = text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table")
+    elif conn.dialect.name == 'postgresql':
+        query = text("SELECT indexname FROM pg_indexes WHERE tablename = :table")
+    else:
+        return {ix['name'] for ix in db.inspect(conn).get_indexes(table_name)}
+    return set(conn.execute(query, {'table': table_name}).scalars())
+
+def migrate():
+    app = create_app()
+    
+    with app.app_context():
+        for table in (HabitEntry.__table__, User.__table__):
+            with db.engine.connect() as conn:
+                existing = existing_index_names(conn, table.name)
+            
+            for index in table.indexes:
+                if index.name in existing:
+                    print(f"Index '{index.name}' already exists.")
+                    continue
+                
+                print(f"Creating index '{index.name}' on {table.name}...")
+                with db.engine.begin() as conn:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+            
+            for name in OBSOLETE_INDEXES.get(table.name, ()):
+                if name in existing:
+                    print(f"Dropping unused index '{name}' on {table.name}...")
+                    with db.engine.begin() as conn:
+                        conn.execute(text(f'DROP INDEX {name}'))
+        
+        print("Migration completed successfully!")
+
+if __name__ == '__main__':
+    migrate()
@@ -4,7 +4,6 @@ This sets existing achievements to notified=True to avoid re-showing old notific
 """
 
 from app import create_app, db
-from app.models import Achievement
 from sqlalchemy import text
 
 def migrate():
@@ -21,19 +20,15 @@ def migrate():
         
         print("Adding 'notified' column to Achievement table...")
         
-        # Add the column with default value False
-        with db.engine.connect() as conn:
+        # Add the column with default value False, and set all existing achievements
+        # to notified=True to avoid re-showing, in one transaction with plain SQL
+        with db.engine.begin() as conn:
             conn.execute(text('ALTER TABLE achievement ADD COLUMN notified BOOLEAN DEFAULT 0'))
-            conn.commit()
+            print("Column added successfully.")
+            
+            print("Marking all existing achievements as notified...")
+            count = conn.execute(text('UPDATE achievement SET notified = 1')).rowcount
         
-        print("Column added successfully.")
-        
-        # Set all existing achievements to notified=True to avoid re-showing
-        print("Marking all existing achievements as notified...")
-        Achievement.query.update({'notified': True})
-        db.session.commit()
-        
-        count = Achievement.query.count()
         print(f"Updated {count} achievement(s) to notified=True")
         print("Migration completed successfully!")
 